@@ -1,27 +1,34 @@
 #!/usr/bin/env python3
 """
 Database initialization script for WebRadio9
-Drops existing tables and creates new ones based on current models
+Creates any missing tables and columns; pass --destroy to drop and recreate everything
 """
 
 import sys
 import os
+import argparse
 sys.path.append(os.path.dirname(__file__))
 
 from shared.models import Base, engine, create_tables
 from shared.logging import setup_logger
+from migrate import migrate
 
 logger = setup_logger('init_db')
 
-def init_database():
-    """Drop all tables and recreate them"""
+def init_database(destroy=False):
+    """Bring the schema up to date, or drop all tables and recreate them when destroy is set"""
     try:
-        logger.info("Dropping existing tables...")
-        Base.metadata.drop_all(bind=engine)
+        if destroy:
+            logger.info("Dropping existing tables...")
+            Base.metadata.drop_all(bind=engine)
         
-        logger.info("Creating new tables...")
+        # create_all only emits CREATE TABLE for tables that don't exist yet
+        logger.info("Creating missing tables...")
         create_tables()
         
+        # Columns added to existing tables since they were created
+        migrate()
+        
         logger.info("Database initialized successfully!")
         
     except Exception as e:
@@ -29,4 +36,8 @@ def init_database():
         sys.exit(1)
 
 if __name__ == "__main__":
-    init_database()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--destroy', action='store_true',
+                        help='drop all tables first (deletes all data)')
+    args = parser.parse_args()
+    init_database(destroy=args.destroy)
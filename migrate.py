@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Migration script to bring the recordings and podcast_episodes tables up to date
+Adds any missing columns and indexes with a single ALTER TABLE per table so InnoDB rebuilds each once
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+from shared.models import get_db
+from shared.logging import setup_logger
+from sqlalchemy import text
+
+logger = setup_logger('migrate')
+
+# Column name -> ALTER TABLE clauses that add it
+RECORDING_COLUMNS = {
+    'nextcloud_base_dir': [
+        "ADD COLUMN nextcloud_base_dir VARCHAR(255) DEFAULT '/Recordings'"
+    ],
+    'podcast_id': [
+        "ADD COLUMN podcast_id INT NULL",
+        "ADD CONSTRAINT fk_recordings_podcast_id FOREIGN KEY (podcast_id) REFERENCES podcasts(id) ON DELETE SET NULL"
+    ],
+    'recurrence_end': [
+        "ADD COLUMN recurrence_end DATETIME NULL"
+    ]
+}
+
+# Index name -> ALTER TABLE clause that adds it (kept in step with Recording.__table_args__)
+RECORDING_INDEXES = {
+    'ix_rec_series': "ADD INDEX ix_rec_series (name, station_id, is_recurring, start_time)",
+    'ix_rec_status_start': "ADD INDEX ix_rec_status_start (status, start_time)",
+    'ix_rec_status_end': "ADD INDEX ix_rec_status_end (status, end_time)",
+    'ix_rec_status_created': "ADD INDEX ix_rec_status_created (status, created_at DESC)"
+}
+
+# Same as above for the podcast_episodes table (kept in step with PodcastEpisode.__table_args__)
+PODCAST_EPISODE_INDEXES = {
+    'ix_podcastep_podcast_epnum': "ADD INDEX ix_podcastep_podcast_epnum (podcast_id, episode_number)"
+}
+
+def migrate():
+    """Add missing columns and indexes to the recordings and podcast_episodes tables; errors propagate"""
+    with get_db() as db:
+        # Fetch the existing columns once instead of probing each one
+        existing = {row[0] for row in db.execute(text(
+            "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'recordings'"
+        ))}
+
+        clauses = []
+        for column, column_clauses in RECORDING_COLUMNS.items():
+            if column in existing:
+                logger.info(f"Column {column} already exists in recordings table")
+                continue
+            clauses.extend(column_clauses)
+
+        existing_indexes = {row[0] for row in db.execute(text(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'recordings'"
+        ))}
+
+        for index, clause in RECORDING_INDEXES.items():
+            if index in existing_indexes:
+                logger.info(f"Index {index} already exists on recordings table")
+                continue
+            clauses.append(clause)
+
+        if clauses:
+            db.execute(text(f"ALTER TABLE recordings {', '.join(clauses)}"))
+            logger.info("Successfully migrated recordings table")
+
+        existing_episode_indexes = {row[0] for row in db.execute(text(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'podcast_episodes'"
+        ))}
+
+        episode_clauses = []
+        for index, clause in PODCAST_EPISODE_INDEXES.items():
+            if index in existing_episode_indexes:
+                logger.info(f"Index {index} already exists on podcast_episodes table")
+                continue
+            episode_clauses.append(clause)
+
+        if episode_clauses:
+            db.execute(text(f"ALTER TABLE podcast_episodes {', '.join(episode_clauses)}"))
+            logger.info("Successfully migrated podcast_episodes table")
+
+        db.commit()
+
+if __name__ == '__main__':
+    try:
+        migrate()
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
@@ -8,7 +8,10 @@ import sys
 import os
 import subprocess
 import signal
+import select
 import time
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import fcntl
 
@@ -32,32 +35,73 @@ class ServiceRunner:
             'podcast'
         ]
         self.lock_file = None
+        self.pidfds = {}  # pidfd -> service name
+        self.epoll = self.create_epoll()
         
     def acquire_lock(self):
         """Prevent multiple instances of run_services"""
         try:
             lock_path = Path(__file__).parent / 'run_services.lock'
-            self.lock_file = open(lock_path, 'w')
-            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            self.lock_file.write(str(os.getpid()))
-            self.lock_file.flush()
-            return True
-        except IOError:
+            # Open without truncating so a losing instance can't clobber the holder's PID
+            self.lock_file = open(lock_path, 'a+')
+            # POSIX record lock: the kernel drops it when the process dies, so a crash never leaves it stale
+            fcntl.lockf(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            if self.lock_file:
+                self.lock_file.close()
+                self.lock_file = None
             print("❌ Another instance of run_services.py is already running!")
             print("   Stop it first with: pkill -f run_services")
             return False
+        
+        self.lock_file.seek(0)
+        self.lock_file.truncate()
+        self.lock_file.write(str(os.getpid()))
+        self.lock_file.flush()
+        atexit.register(self.release_lock)
+        return True
     
     def release_lock(self):
-        """Release the process lock"""
-        if self.lock_file:
+        """Release the process lock; the lock file itself is left in place"""
+        if not self.lock_file:
+            return
+        try:
+            fcntl.lockf(self.lock_file, fcntl.LOCK_UN)
+        except OSError as e:
+            logger.warning(f"Failed to release lock: {e}")
+        finally:
+            self.lock_file.close()
+            self.lock_file = None
+    
+    def create_epoll(self):
+        """Return an epoll set for child pidfds, or None where pidfds are unsupported (kernel < 5.3)"""
+        if not hasattr(os, 'pidfd_open') or not hasattr(select, 'epoll'):
+            return None
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except OSError:
+            return None
+        return select.epoll()
+    
+    def track_process(self, service_name, process):
+        """Record a running service and wake the monitor as soon as it exits"""
+        self.processes[service_name] = process
+        if self.epoll:
             try:
-                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
-                self.lock_file.close()
-                lock_path = Path(__file__).parent / 'run_services.lock'
-                if lock_path.exists():
-                    lock_path.unlink()
-            except:
-                pass
+                fd = os.pidfd_open(process.pid)
+                self.epoll.register(fd, select.EPOLLIN)
+                self.pidfds[fd] = service_name
+            except OSError as e:
+                logger.warning(f"Cannot watch {service_name} via pidfd, relying on periodic checks: {e}")
+    
+    def untrack_pidfd(self, fd):
+        """Stop watching a pidfd whose process has exited"""
+        self.pidfds.pop(fd, None)
+        try:
+            self.epoll.unregister(fd)
+        except (OSError, ValueError):
+            pass
+        os.close(fd)
     
     def start_service(self, service_name):
         """Start a single service"""
@@ -71,19 +115,14 @@ class ServiceRunner:
                 logger.error(f"Service file not found: {service_path}")
                 return None
             
-            # Set up environment and working directory
-            env = os.environ.copy()
-            project_root = str(Path(__file__).parent)
-            
-            # Use subprocess with proper session handling
+            # No cwd, new session or fd closing: any of those makes subprocess fall back
+            # from posix_spawn to fork+exec, which copies this process's page tables
             process = subprocess.Popen([
                 sys.executable, str(service_path)
-            ], 
-            cwd=project_root,
-            env=env,
+            ],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            start_new_session=True)  # Start new session to avoid signal propagation
+            close_fds=False)  # Our own descriptors are all O_CLOEXEC, so nothing leaks
             
             logger.info(f"Started {service_name} service (PID: {process.pid})")
             return process
@@ -96,11 +135,19 @@ class ServiceRunner:
         """Start all microservices"""
         logger.info("Starting WebRadio9 microservices...")
         
-        for service_name in self.services:
-            process = self.start_service(service_name)
+        # Services only depend on the broker and database, so launch them all at once
+        with ThreadPoolExecutor(max_workers=len(self.services)) as executor:
+            processes = list(executor.map(self.start_service, self.services))
+        
+        for service_name, process in zip(self.services, processes):
             if process:
-                self.processes[service_name] = process
-                time.sleep(1)  # Small delay between starts
+                self.track_process(service_name, process)
+        
+        # Give every service a moment to fail fast; the monitor restarts any that did
+        time.sleep(0.5)
+        for service_name, process in self.processes.items():
+            if process.poll() is not None:
+                logger.warning(f"Service {service_name} exited right after start (code {process.returncode})")
     
     def stop_all_services(self):
         """Stop all running services"""
@@ -116,6 +163,9 @@ class ServiceRunner:
                 logger.warning(f"Force killed {service_name} service")
             except Exception as e:
                 logger.error(f"Error stopping {service_name}: {e}")
+        
+        for fd in list(self.pidfds):
+            self.untrack_pidfd(fd)
     
     def restart_all_services(self):
         """Restart all services"""
@@ -134,14 +184,19 @@ class ServiceRunner:
         """Monitor running services and restart if needed"""
         while True:
             try:
+                if self.epoll:
+                    # Block until a child exits; the timeout only keeps a periodic sweep as fallback
+                    for fd, _ in self.epoll.poll(timeout=10):
+                        self.untrack_pidfd(fd)
+                else:
+                    time.sleep(10)  # Check every 10 seconds
+                
                 for service_name, process in list(self.processes.items()):
                     if process.poll() is not None:
                         logger.warning(f"Service {service_name} died, restarting...")
                         new_process = self.start_service(service_name)
                         if new_process:
-                            self.processes[service_name] = new_process
-                
-                time.sleep(10)  # Check every 10 seconds
+                            self.track_process(service_name, new_process)
                 
             except KeyboardInterrupt:
                 logger.info("Shutdown requested")
@@ -156,6 +211,9 @@ class ServiceRunner:
         if not self.acquire_lock():
             sys.exit(1)
         
+        # Services inherit the working directory, so set it once instead of per spawn
+        os.chdir(Path(__file__).parent)
+        
         # Setup signal handlers
         signal.signal(signal.SIGINT, lambda s, f: self.cleanup_and_exit())
         signal.signal(signal.SIGTERM, lambda s, f: self.cleanup_and_exit())
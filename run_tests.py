@@ -6,8 +6,8 @@ Runs all test suites and provides comprehensive system validation
 
 import sys
 import os
+import runpy
 import subprocess
-import time
 from pathlib import Path
 
 def run_test_suite(test_file, description):
@@ -17,12 +17,12 @@ def run_test_suite(test_file, description):
     print(f"{'='*60}")
     
     try:
-        result = subprocess.run([
-            sys.executable, test_file
-        ], cwd=Path(__file__).parent, capture_output=False, text=True)
-        
-        return result.returncode == 0
+        # Run in this interpreter so SQLAlchemy, pika etc. are imported only once
+        runpy.run_path(str(Path(__file__).parent / test_file), run_name='__main__')
+        return True
         
+    except SystemExit as e:
+        return e.code in (0, None)
     except Exception as e:
         print(f"Failed to run {description}: {e}")
         return False
@@ -93,8 +93,6 @@ def main():
         
         if not success:
             print(f"\n⚠️  {description} had failures")
-        
-        time.sleep(2)  # Brief pause between test suites
     
     # Overall summary
     print(f"\n{'='*60}")
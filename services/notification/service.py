@@ -2,39 +2,60 @@ import sys
 import os
 import requests
 import threading
-from flask import Flask, jsonify
+from requests.adapters import HTTPAdapter
+from sqlalchemy.orm import load_only
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
 from shared.events import event_bus
+from shared.health import HealthServer
 from shared.models import get_db, Recording
 
 logger = setup_logger('notification')
 
+# Keep-alive session so bursts of notifications reuse one TLS connection to Pushover
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 class NotificationService:
     def __init__(self):
         self.event_bus_ready = False
+        # Credentials are fixed for the life of the process; read them once
+        self.pushover_credentials = (
+            config.get('pushover', 'api_token'),
+            config.get('pushover', 'user_key')
+        )
+        # Constant part of every Pushover request body
+        self.pushover_body = {
+            'token': self.pushover_credentials[0],
+            'user': self.pushover_credentials[1]
+        }
         self.setup_event_handlers()
         self.start_health_server()
+        self.warm_pushover_connection()
     
-    def start_health_server(self):
-        """Start Flask health check server on port 5005"""
-        app = Flask(__name__)
-        
-        @app.route('/health')
-        def health():
-            return jsonify({
-                'status': 'ready' if self.event_bus_ready else 'starting',
-                'event_bus_connected': self.event_bus_ready
-            })
+    def warm_pushover_connection(self):
+        """Open the Pushover TLS connection in the background so the first notification skips DNS and handshake"""
+        if not all(self.pushover_credentials):
+            return
         
-        # Start in background thread
-        def run_health_server():
-            app.run(host='0.0.0.0', port=5005, debug=False)
+        def warm():
+            try:
+                _session.head('https://api.pushover.net/1/', timeout=10)
+            except Exception as e:
+                logger.warning(f"Pushover connection warm-up failed: {e}")
         
-        health_thread = threading.Thread(target=run_health_server, daemon=True)
-        health_thread.start()
+        threading.Thread(target=warm, daemon=True).start()
+    
+    def start_health_server(self):
+        """Start health check server on port 5005"""
+        self.health = HealthServer(5005, {
+            'status': 'ready' if self.event_bus_ready else 'starting',
+            'event_bus_connected': self.event_bus_ready
+        })
     
     def setup_event_handlers(self):
         try:
@@ -52,8 +73,15 @@ class NotificationService:
             file_size = message.get('file_size', 0)
             duration = message.get('duration', 0)
             
-            db = next(get_db())
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            with get_db() as db:
+                # Fetch only the columns used to build the notification
+                recording = db.query(Recording).options(load_only(
+                    Recording.name,
+                    Recording.save_to_additional_local,
+                    Recording.local_storage_status,
+                    Recording.save_to_nextcloud,
+                    Recording.nextcloud_storage_status
+                )).filter(Recording.id == recording_id).one_or_none()
             
             if not recording:
                 return
@@ -91,21 +119,13 @@ class NotificationService:
     def send_pushover_notification(self, title, message):
         """Send notification via Pushover"""
         try:
-            api_token = config.get('pushover', 'api_token')
-            user_key = config.get('pushover', 'user_key')
-            
-            if not api_token or not user_key:
+            if not all(self.pushover_credentials):
                 logger.warning("Pushover credentials not configured")
                 return
             
-            data = {
-                'token': api_token,
-                'user': user_key,
-                'title': title,
-                'message': message
-            }
+            data = {**self.pushover_body, 'title': title, 'message': message}
             
-            response = requests.post('https://api.pushover.net/1/messages.json', data=data, timeout=10)
+            response = _session.post('https://api.pushover.net/1/messages.json', data=data, timeout=10)
             
             if response.status_code == 200:
                 logger.info(f"Notification sent: {title}")
@@ -120,9 +140,8 @@ class NotificationService:
         if not seconds:
             return "0s"
         
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
+        hours, rem = divmod(seconds, 3600)
+        minutes, secs = divmod(rem, 60)
         
         if hours:
             return f"{hours}h {minutes}m {secs}s"
@@ -136,12 +155,9 @@ class NotificationService:
         if not bytes:
             return "0 B"
         
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if bytes < 1024:
-                return f"{bytes:.1f} {unit}"
-            bytes /= 1024
-        
-        return f"{bytes:.1f} TB"
+        # Every 10 bits of magnitude is one 1024x unit step
+        unit = min((int(bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+        return f"{bytes / (1 << (10 * unit)):.1f} {SIZE_UNITS[unit]}"
     
     def run(self):
         logger.info("Notification service starting...")
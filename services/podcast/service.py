@@ -1,41 +1,44 @@
 import sys
 import os
-import threading
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, jsonify
+from sqlalchemy import func, insert
+from sqlalchemy.orm import selectinload, joinedload
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
 from shared.events import event_bus
+from shared.health import HealthServer
 from shared.models import get_db, Recording, Podcast, PodcastEpisode
 
 logger = setup_logger('podcast')
 
+ITUNES_NS = 'http://www.itunes.com/dtds/podcast-1.0.dtd'
+ITUNES = f'{{{ITUNES_NS}}}'
+ET.register_namespace('itunes', ITUNES_NS)
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+# Episodes are flushed once this many are queued, or this many seconds after the first
+EPISODE_BATCH_SIZE = 50
+EPISODE_FLUSH_DELAY = 0.1
+
 class PodcastService:
     def __init__(self):
         self.event_bus_ready = False
+        self._pending_episodes = []  # (podcast_id, recording_id) awaiting the next flush
+        self._flush_scheduled = False
         self.setup_event_handlers()
         self.start_health_server()
     
     def start_health_server(self):
-        """Start Flask health check server on port 5006"""
-        app = Flask(__name__)
-        
-        @app.route('/health')
-        def health():
-            return jsonify({
-                'status': 'ready' if self.event_bus_ready else 'starting',
-                'event_bus_connected': self.event_bus_ready
-            })
-        
-        # Start in background thread
-        def run_health_server():
-            app.run(host='0.0.0.0', port=5006, debug=False)
-        
-        health_thread = threading.Thread(target=run_health_server, daemon=True)
-        health_thread.start()
+        """Start health check server on port 5006"""
+        self.health = HealthServer(5006, {
+            'status': 'ready' if self.event_bus_ready else 'starting',
+            'event_bus_connected': self.event_bus_ready
+        })
     
     def setup_event_handlers(self):
         try:
@@ -55,8 +58,8 @@ class PodcastService:
             if status == 'FAILED':
                 return
             
-            db = next(get_db())
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            with get_db() as db:
+                recording = db.query(Recording).filter(Recording.id == recording_id).first()
             
             # Check if this recording was scheduled for a podcast
             # This would be set during recording scheduling
@@ -66,97 +69,140 @@ class PodcastService:
             logger.error(f"Podcast episode creation failed: {e}")
     
     def handle_episode_add(self, message):
-        """Add episode to podcast"""
+        """Queue an episode; bursts are written in one batch"""
         try:
-            podcast_id = message['podcast_id']
-            recording_id = message['recording_id']
-            
-            db = next(get_db())
-            podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
-            
-            if not podcast or not recording:
-                return
-            
-            # Get next episode number
-            last_episode = db.query(PodcastEpisode).filter(
-                PodcastEpisode.podcast_id == podcast_id
-            ).order_by(PodcastEpisode.episode_number.desc()).first()
-            
-            episode_number = (last_episode.episode_number + 1) if last_episode else 1
-            
-            # Create episode
-            episode = PodcastEpisode(
-                podcast_id=podcast_id,
-                recording_id=recording_id,
-                title=f"{recording.name} - {recording.start_time.strftime('%Y-%m-%d')}",
-                description=f"Recorded from {recording.station.name}",
-                episode_number=episode_number,
-                pub_date=recording.start_time
-            )
-            
-            db.add(episode)
-            db.commit()
-            
-            logger.info(f"Added episode {episode_number} to podcast {podcast.title}")
+            self._pending_episodes.append((message['podcast_id'], message['recording_id']))
+        except Exception as e:
+            logger.error(f"Episode addition failed: {e}")
+            return
+        
+        if len(self._pending_episodes) >= EPISODE_BATCH_SIZE:
+            self.flush_episodes()
+        elif not self._flush_scheduled:
+            # call_later runs on the consuming thread, so the flush never races the pika connection
+            event_bus.connection.call_later(EPISODE_FLUSH_DELAY, self.flush_episodes)
+            self._flush_scheduled = True
+    
+    def flush_episodes(self):
+        """Insert all queued episodes with one INSERT and one commit"""
+        self._flush_scheduled = False
+        pending, self._pending_episodes = self._pending_episodes, []
+        if not pending:
+            return
+        
+        try:
+            podcast_ids = {podcast_id for podcast_id, _ in pending}
+            recording_ids = {recording_id for _, recording_id in pending}
+            
+            with get_db() as db:
+                podcasts = dict(db.query(Podcast.id, Podcast.title).filter(Podcast.id.in_(podcast_ids)).all())
+                recordings = {
+                    recording.id: recording
+                    for recording in db.query(Recording).options(joinedload(Recording.station)).filter(
+                        Recording.id.in_(recording_ids)
+                    )
+                }
+                
+                # Highest existing episode number of every podcast in the batch
+                last_numbers = dict(db.query(
+                    PodcastEpisode.podcast_id, func.max(PodcastEpisode.episode_number)
+                ).filter(PodcastEpisode.podcast_id.in_(podcast_ids)).group_by(PodcastEpisode.podcast_id).all())
+                
+                rows = []
+                for podcast_id, recording_id in pending:
+                    recording = recordings.get(recording_id)
+                    if podcast_id not in podcasts or not recording:
+                        continue
+                    
+                    # Get next episode number
+                    episode_number = (last_numbers.get(podcast_id) or 0) + 1
+                    last_numbers[podcast_id] = episode_number
+                    
+                    rows.append({
+                        'podcast_id': podcast_id,
+                        'recording_id': recording_id,
+                        'title': f"{recording.name} - {recording.start_time.strftime('%Y-%m-%d')}",
+                        'description': f"Recorded from {recording.station.name}",
+                        'episode_number': episode_number,
+                        'pub_date': recording.start_time
+                    })
+                
+                if not rows:
+                    return
+                
+                db.execute(insert(PodcastEpisode), rows)
+                db.commit()
             
-            event_bus.publish('podcast.rss.update', {
-                'podcast_id': podcast_id
-            })
+            for row in rows:
+                logger.info(f"Added episode {row['episode_number']} to podcast {podcasts[row['podcast_id']]}")
             
+            # One feed update per podcast, however many episodes it gained
+            for podcast_id in {row['podcast_id'] for row in rows}:
+                event_bus.publish('podcast.rss.update', {
+                    'podcast_id': podcast_id
+                })
+                
         except Exception as e:
             logger.error(f"Episode addition failed: {e}")
     
     def generate_rss_feed(self, podcast_id, base_url="http://localhost:5000"):
         """Generate RSS feed for podcast"""
         try:
-            db = next(get_db())
-            podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
-            
-            if not podcast:
-                return None
-            
-            episodes = db.query(PodcastEpisode).filter(
-                PodcastEpisode.podcast_id == podcast_id
-            ).join(Recording).filter(
-                Recording.file_path.isnot(None)
-            ).order_by(PodcastEpisode.pub_date.desc()).all()
-            
-            # Build RSS XML
-            rss_items = []
-            for episode in episodes:
-                if not episode.recording.file_path:
-                    continue
+            with get_db() as db:
+                podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
                 
-                file_path = Path(episode.recording.file_path)
-                if not file_path.exists():
-                    continue
+                if not podcast:
+                    return None
                 
-                # Build episode URL
-                episode_url = f"{base_url}/recordings/{episode.recording.id}/download"
+                # Load every episode's recording in one extra SELECT instead of one per episode
+                episodes = db.query(PodcastEpisode).options(
+                    selectinload(PodcastEpisode.recording)
+                ).filter(
+                    PodcastEpisode.podcast_id == podcast_id
+                ).join(Recording).filter(
+                    Recording.file_path.isnot(None)
+                ).order_by(PodcastEpisode.pub_date.desc()).all()
                 
-                rss_items.append(f"""
-                <item>
-                    <title>{self.escape_xml(episode.title)}</title>
-                    <description>{self.escape_xml(episode.description or '')}</description>
-                    <enclosure url="{episode_url}" length="{episode.recording.file_size or 0}" type="audio/mpeg"/>
-                    <guid>{episode_url}</guid>
-                    <pubDate>{episode.pub_date.strftime('%a, %d %b %Y %H:%M:%S +0000')}</pubDate>
-                </item>""")
-            
-            rss_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
-    <channel>
-        <title>{self.escape_xml(podcast.title)}</title>
-        <description>{self.escape_xml(podcast.description or '')}</description>
-        <language>{podcast.language}</language>
-        <itunes:author>{self.escape_xml(podcast.author or '')}</itunes:author>
-        <itunes:email>{self.escape_xml(podcast.email or '')}</itunes:email>
-        <itunes:category text="{self.escape_xml(podcast.category or 'Technology')}"/>
-        <link>{base_url}/podcasts/{podcast.uuid}</link>
-        {''.join(rss_items)}
-    </channel>
-</rss>"""
+                # Build RSS XML (ElementTree escapes text and attributes for us)
+                rss = ET.Element('rss', version='2.0')
+                channel = ET.SubElement(rss, 'channel')
+                ET.SubElement(channel, 'title').text = podcast.title
+                ET.SubElement(channel, 'description').text = podcast.description or ''
+                ET.SubElement(channel, 'language').text = podcast.language
+                ET.SubElement(channel, ITUNES + 'author').text = podcast.author or ''
+                ET.SubElement(channel, ITUNES + 'email').text = podcast.email or ''
+                ET.SubElement(channel, ITUNES + 'category', text=podcast.category or 'Technology')
+                ET.SubElement(channel, 'link').text = f"{base_url}/podcasts/{podcast.uuid}"
+                
+                # List each recordings directory once instead of stat()ing every episode file
+                existing_files = {}
+                for directory in {Path(e.recording.file_path).parent for e in episodes if e.recording.file_path}:
+                    try:
+                        with os.scandir(directory) as entries:
+                            existing_files[directory] = {entry.name for entry in entries}
+                    except OSError:
+                        existing_files[directory] = set()
+                
+                for episode in episodes:
+                    if not episode.recording.file_path:
+                        continue
+                    
+                    file_path = Path(episode.recording.file_path)
+                    if file_path.name not in existing_files[file_path.parent]:
+                        continue
+                    
+                    # Build episode URL
+                    episode_url = f"{base_url}/recordings/{episode.recording.id}/download"
+                    
+                    item = ET.SubElement(channel, 'item')
+                    ET.SubElement(item, 'title').text = episode.title
+                    ET.SubElement(item, 'description').text = episode.description or ''
+                    ET.SubElement(item, 'enclosure', url=episode_url,
+                                  length=str(episode.recording.file_size or 0), type='audio/mpeg')
+                    ET.SubElement(item, 'guid').text = episode_url
+                    ET.SubElement(item, 'pubDate').text = episode.pub_date.strftime('%a, %d %b %Y %H:%M:%S +0000')
+            
+            rss_content = XML_DECLARATION + ET.tostring(rss, encoding='unicode')
             
             return rss_content
             
@@ -164,16 +210,6 @@ class PodcastService:
             logger.error(f"RSS generation failed: {e}")
             return None
     
-    def escape_xml(self, text):
-        """Escape XML special characters"""
-        if not text:
-            return ""
-        return (text.replace('&', '&amp;')
-                   .replace('<', '&lt;')
-                   .replace('>', '&gt;')
-                   .replace('"', '&quot;')
-                   .replace("'", '&#39;'))
-    
     def run(self):
         logger.info("Podcast service starting...")
         try:
@@ -1,52 +1,174 @@
 import sys
 import os
+import asyncio
 import subprocess
 import threading
-from datetime import datetime
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, jsonify
+from types import MappingProxyType
+from sqlalchemy import or_, insert, select, exists, literal
+from sqlalchemy.orm import joinedload
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
 from shared.events import event_bus
-from shared.models import get_db, Recording, Station, RecordingPart
+from shared.health import HealthServer
+from shared.models import SessionLocal, Recording, RecordingPart
+from shared.recurrence import calculate_next_recurrence
 
 logger = setup_logger('recording')
 
+# Threads handling bus events, so slow database work never stalls the consumer
+EVENT_WORKERS = 4
+
+# Date suffix appended to recording file names, e.g. 250613-Fri
+OUTPUT_TIMESTAMP_FORMAT = '%y%m%d-%a'
+
+# English ordinal suffix for each day of the month, indexed by day
+ORDINAL_SUFFIXES = ('',
+    'st', 'nd', 'rd', 'th', 'th', 'th', 'th', 'th', 'th', 'th',
+    'th', 'th', 'th', 'th', 'th', 'th', 'th', 'th', 'th', 'th',
+    'st', 'nd', 'rd', 'th', 'th', 'th', 'th', 'th', 'th', 'th',
+    'st')
+
+# Leading ffmpeg arguments shared by every recording: overwrite output and keep reconnecting
+FFMPEG_RECORD_ARGS = (
+    'ffmpeg', '-y',
+    '-reconnect', '1',
+    '-reconnect_streamed', '1',
+    '-reconnect_on_network_error', '1',
+    '-reconnect_delay_max', '300',  # 5 minutes total retry time (10 retries * 30 seconds)
+    '-rw_timeout', '30000000'       # 30 second network timeout (in microseconds)
+)
+
+# ffmpeg encoder for each output format
+CODECS = MappingProxyType({
+    'mp3': 'libmp3lame',
+    'aac': 'aac',
+    'm4a': 'aac',
+    'mp4': 'aac'
+})
+
+# ffmpeg's stderr is drained in chunks of this size, keeping only the last few
+STDERR_CHUNK_SIZE = 4096
+STDERR_CHUNKS_KEPT = 16
+
+async def run_ffmpeg(cmd):
+    """Run ffmpeg to completion and return its exit code and the tail of its stderr"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    tail = deque(maxlen=STDERR_CHUNKS_KEPT)
+    
+    # Progress output never stops during a recording; a bounded ring keeps memory flat for hours
+    while chunk := await process.stderr.read(STDERR_CHUNK_SIZE):
+        tail.append(chunk)
+    
+    return await process.wait(), b''.join(tail)
+
 class RecordingService:
     def __init__(self):
         self.active_recordings = {}
+        self.active_count = 0  # len(active_recordings), kept separately for the health payload
         self.event_bus_ready = False
-        self.setup_event_handlers()
+        self.health = None
+        self.health_lock = threading.Lock()
+        self._session_local = threading.local()
+        # Workers launch ffmpeg and store its result; they are released while ffmpeg runs,
+        # so max_parallel sizes the pool rather than capping concurrent recordings
+        self.recording_pool = ThreadPoolExecutor(
+            max_workers=config.getint('recording', 'max_parallel', fallback=64),
+            thread_name_prefix='rec'
+        )
+        self.start_supervisor()
+        self.start_event_workers()
         
-        # Start health check server
+        # Start health check server first so probes get 'starting' while we connect
         self.start_health_server()
-    
-    def start_health_server(self):
-        """Start Flask health check server on port 5001"""
-        app = Flask(__name__)
         
-        @app.route('/health')
-        def health():
-            return jsonify({
-                'status': 'ready' if self.event_bus_ready else 'starting',
-                'event_bus_connected': self.event_bus_ready,
-                'active_recordings': len(self.active_recordings)
-            })
+        self.setup_event_handlers()
+        self.refresh_health()
+    
+    def start_supervisor(self):
+        """Await every running ffmpeg process from one event loop thread"""
+        self.loop = asyncio.new_event_loop()
         
-        # Start in background thread
-        def run_health_server():
-            app.run(host='0.0.0.0', port=5001, debug=False)
+        # pidfds let the loop itself notice exits; the default watcher parks a thread on each child
+        if hasattr(os, 'pidfd_open'):
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.loop)
+            asyncio.set_child_watcher(watcher)
         
-        health_thread = threading.Thread(target=run_health_server, daemon=True)
-        health_thread.start()
+        threading.Thread(target=self.loop.run_forever, name='ffmpeg-supervisor', daemon=True).start()
+    
+    def start_event_workers(self):
+        """Handle events off the consumer thread, one queue per worker"""
+        self.event_queues = [queue.SimpleQueue() for _ in range(EVENT_WORKERS)]
+        for index, events in enumerate(self.event_queues):
+            threading.Thread(target=self.process_events, args=(events,), name=f'events-{index}', daemon=True).start()
+    
+    def dispatch(self, handler):
+        """Wrap a handler so the consumer thread only enqueues the message"""
+        def enqueue(message):
+            # Events for one recording always share a queue, so they stay in order
+            # and a duplicate start can't race the original
+            events = self.event_queues[hash(message.get('recording_id')) % EVENT_WORKERS]
+            events.put((handler, message))
+        return enqueue
+    
+    def process_events(self, events):
+        while True:
+            handler, message = events.get()
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Event handler {handler.__name__} failed: {e}")
+    
+    def start_health_server(self):
+        """Start health check server on port 5001"""
+        self.health = HealthServer(5001, self.health_status())
+    
+    def health_status(self):
+        return {
+            'status': 'ready' if self.event_bus_ready else 'starting',
+            'event_bus_connected': self.event_bus_ready,
+            'active_recordings': self.active_count
+        }
+    
+    def refresh_health(self, active_delta=0):
+        """Apply a change to the active count and re-encode the health payload"""
+        # Serialised so a slower thread can't overwrite a newer count with a stale one
+        with self.health_lock:
+            self.active_count += active_delta
+            if self.health:
+                self.health.set_status(self.health_status())
+    
+    @contextmanager
+    def session(self):
+        """Yield this thread's session; the outermost block ends its transaction"""
+        local = self._session_local
+        db = SessionLocal()
+        local.depth = getattr(local, 'depth', 0) + 1
+        try:
+            yield db
+        finally:
+            local.depth -= 1
+            if not local.depth:
+                # Hands the connection back to the pool and expires loaded rows,
+                # but keeps the session for the next handler on this thread
+                db.rollback()
     
     def setup_event_handlers(self):
         try:
             event_bus.connect()  # Connect when setting up
-            event_bus.subscribe('recording.start', self.handle_recording_start)
-            event_bus.subscribe('recording.stop', self.handle_recording_stop)
+            event_bus.subscribe('recording.start', self.dispatch(self.handle_recording_start))
+            event_bus.subscribe('recording.stop', self.dispatch(self.handle_recording_stop))
             self.event_bus_ready = True
             logger.info("Event bus connected and ready")
         except Exception as e:
@@ -64,66 +186,55 @@ class RecordingService:
                 return
             
             # Double-check database status to prevent race conditions
-            db = next(get_db())
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
-            if not recording or recording.status not in ['RECORDING']:
-                logger.warning(f"Recording {recording_id} not in RECORDING status, ignoring start event")
-                return
-            
-            logger.info(f"DEBUG: handle_recording_start called with message: {message}")
-            
-            station_id = message['station_id']
-            name = message['name']
-            format = message['format']
-            bitrate = message['bitrate']
-            end_time = datetime.fromisoformat(message['end_time'])
-            
-            logger.info(f"DEBUG: Parsed message - recording_id: {recording_id}, station_id: {station_id}")
-            
-            # Get station info
-            logger.info(f"DEBUG: Got database connection")
-            
-            station = db.query(Station).filter(Station.id == station_id).first()
-            logger.info(f"DEBUG: Queried station, found: {station is not None}")
-            
-            if not station or not station.is_valid:
-                logger.error(f"Invalid station for recording {recording_id}")
-                return
-            
-            logger.info(f"DEBUG: Station is valid, creating output file path")
-            
-            # Create output file path
-            recordings_dir = Path(config.get('storage', 'recordings_folder'))
-            recordings_dir.mkdir(exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%y%m%d-%a')
-            output_file = recordings_dir / f"{name}{timestamp}.{format}"
-            
-            logger.info(f"DEBUG: Output file: {output_file}")
-            logger.info(f"DEBUG: About to start recording thread")
-            
-            # Start recording in separate thread
-            thread = threading.Thread(
-                target=self.record_stream,
-                args=(recording_id, station.stream_url, output_file, end_time, format, bitrate)
-            )
-            thread.start()
-            
-            logger.info(f"DEBUG: Recording thread started")
-            
-            self.active_recordings[recording_id] = {
-                'thread': thread,
-                'output_file': output_file,
-                'parts': []
-            }
-            
-            logger.info(f"Started recording {name} to {output_file}")
-            
+            with self.session() as db:
+                # Recording and its station in one round-trip
+                recording = db.query(Recording).options(joinedload(Recording.station)).filter(
+                    Recording.id == recording_id
+                ).first()
+                if not recording or recording.status not in ['RECORDING']:
+                    logger.warning(f"Recording {recording_id} not in RECORDING status, ignoring start event")
+                    return
+                
+                name = message['name']
+                format = message['format']
+                bitrate = message['bitrate']
+                # Already a datetime on the row we just loaded; no need to parse the event's copy
+                end_time = recording.end_time
+                
+                station = recording.station
+                if not station or not station.is_valid:
+                    logger.error(f"Invalid station for recording {recording_id}")
+                    return
+                
+                # Create output file path
+                recordings_dir = Path(config.get('storage', 'recordings_folder'))
+                recordings_dir.mkdir(exist_ok=True)
+                
+                timestamp = datetime.now().strftime(OUTPUT_TIMESTAMP_FORMAT)
+                output_file = recordings_dir / f"{name}{timestamp}.{format}"
+                
+                # Registered before the worker starts, so a recording that ends at once is still removed
+                self.active_recordings[recording_id] = {
+                    'output_file': output_file,
+                    'parts': []
+                }
+                self.refresh_health(1)
+                
+                # Launch ffmpeg from a pooled worker thread
+                self.recording_pool.submit(
+                    self.record_stream, recording_id, station.stream_url, output_file, end_time, format, bitrate
+                )
+                
+                logger.info(f"Started recording {name} to {output_file}")
+                
         except Exception as e:
             logger.error(f"Failed to start recording: {e}")
-            logger.error(f"DEBUG: Exception type: {type(e)}")
-            import traceback
-            logger.error(f"DEBUG: Full traceback: {traceback.format_exc()}")
+            logger.debug("Start failure traceback for %s", message, exc_info=True)
+    
+    def finish_recording(self, recording_id):
+        """Drop a recording from the active set once it has been finalised"""
+        if self.active_recordings.pop(recording_id, None):
+            self.refresh_health(-1)
     
     def handle_recording_stop(self, message):
         """Stop an active recording"""
@@ -138,378 +249,261 @@ class RecordingService:
             logger.error(f"Failed to stop recording: {e}")
     
     def record_stream(self, recording_id, stream_url, output_file, end_time, format, bitrate):
-        """Record stream using ffmpeg - simplified single process approach"""
+        """Start ffmpeg for the whole recording on the supervisor loop"""
+        launched = False
         try:
-            db = next(get_db())
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
-            
-            # Calculate total duration
-            total_seconds = int((end_time - datetime.now()).total_seconds())
-            if total_seconds <= 0:
-                logger.warning(f"Recording {recording_id} end time already passed")
-                return
-            
-            logger.info(f"Starting single FFmpeg process for {total_seconds} seconds")
-            
-            # Build ffmpeg command for entire duration with reconnection options
-            cmd = [
-                'ffmpeg', '-y',
-                '-reconnect', '1',
-                '-reconnect_streamed', '1', 
-                '-reconnect_on_network_error', '1',
-                '-reconnect_delay_max', '300',  # 5 minutes total retry time (10 retries * 30 seconds)
-                '-rw_timeout', '30000000',      # 30 second network timeout (in microseconds)
-                '-i', stream_url,
-                '-c:a', 'copy' if format == recording.station.format else self.get_codec(format),
-                '-t', str(total_seconds),
-                str(output_file)
-            ]
-            
-            if bitrate and format != recording.station.format:
-                cmd.extend(['-b:a', f'{bitrate}k'])
-            
-            logger.info(f"FFmpeg command: {' '.join(cmd[-4:])}")  # Log last 4 args for debugging
-            
-            start_time = datetime.now()
-            process = subprocess.run(cmd, capture_output=True, text=False)
-            actual_end_time = datetime.now()
-            
-            if process.returncode == 0 and output_file.exists():
-                # Set correct status based on whether recording was interrupted
-                if recording.was_interrupted:
-                    recording.status = 'PARTIAL'
-                    logger.info(f"Recording completed with interruptions (PARTIAL): {recording.file_size} bytes")
-                else:
-                    recording.status = 'COMPLETE'
-                    logger.info(f"Recording completed successfully: {recording.file_size} bytes, planned duration: {recording.duration}s")
-                
-                recording.file_path = str(output_file)
-                recording.file_size = output_file.stat().st_size
-                # Keep original user-specified duration, don't overwrite with actual time
-            else:
-                recording.status = 'FAILED'
-                error_msg = "FFmpeg failed"
-                if process.stderr:
-                    try:
-                        error_msg = process.stderr.decode('utf-8', errors='ignore')[:200]
-                    except:
-                        pass
-                logger.error(f"Recording failed: {error_msg}")
-            
-            # Commit status to database BEFORE trying to publish events
-            db.commit()
-            
-            # Try to publish completion event (if this fails, recording status is already saved)
-            try:
-                event_bus.publish('recording.completed', {
-                    'recording_id': recording_id,
-                    'status': recording.status,
-                    'file_size': recording.file_size,
-                    'duration': recording.duration
-                })
-                logger.info(f"Published completion event for recording {recording_id}")
-            except Exception as e:
-                logger.error(f"Failed to publish completion event (recording status already saved): {e}")
-            
-            # Remove from active recordings
-            if recording_id in self.active_recordings:
-                del self.active_recordings[recording_id]
-            
-            # Create podcast episode if recording is attached to a podcast and completed successfully
-            if recording.podcast_id and recording.status in ['COMPLETE', 'PARTIAL']:
-                self.create_podcast_episode(recording)
-            
-            # Schedule next recurring instance if this was generated from a recurring recording
-            self.schedule_next_recurring_if_needed(recording)
+            with self.session() as db:
+                recording = db.query(Recording).filter(Recording.id == recording_id).first()
+                
+                # Calculate total duration
+                total_seconds = int((end_time - datetime.now()).total_seconds())
+                if total_seconds <= 0:
+                    logger.warning(f"Recording {recording_id} end time already passed")
+                    return
+                
+                logger.info(f"Starting single FFmpeg process for {total_seconds} seconds")
+                
+                # Stream is copied untouched when it already has the requested format
+                transcode = format != recording.station.format
+                
+                # Build ffmpeg command for entire duration with reconnection options
+                cmd = [
+                    *FFMPEG_RECORD_ARGS,
+                    '-i', stream_url,
+                    '-c:a', CODECS.get(format, 'libmp3lame') if transcode else 'copy',
+                    '-t', str(total_seconds),
+                    str(output_file)
+                ]
+                
+                if bitrate and transcode:
+                    cmd.extend(['-b:a', f'{bitrate}k'])
+                
+                logger.debug("FFmpeg command: %s", ' '.join(cmd))
             
-            # Clean up
-            if recording_id in self.active_recordings:
-                del self.active_recordings[recording_id]
+            # The worker thread is released while ffmpeg runs; finish_stream takes over when it exits
+            supervision = asyncio.run_coroutine_threadsafe(run_ffmpeg(cmd), self.loop)
+            supervision.add_done_callback(
+                lambda done: self.recording_pool.submit(self.finish_stream, recording_id, output_file, done)
+            )
+            launched = True
             
         except Exception as e:
             logger.error(f"Recording failed for {recording_id}: {e}")
             # Mark as failed in database
             try:
-                db = next(get_db())
-                recording = db.query(Recording).filter(Recording.id == recording_id).first()
-                if recording:
-                    recording.status = 'FAILED'
-                    db.commit()
+                with self.session() as db:
+                    recording = db.query(Recording).filter(Recording.id == recording_id).first()
+                    if recording:
+                        recording.status = 'FAILED'
+                        db.commit()
             except:
                 pass
-            
-            # Merge parts if multiple
-            if len(total_parts) > 1:
-                self.merge_parts(total_parts, output_file)
-                # Multiple parts indicate interruptions
-                recording.status = 'PARTIAL'
-                logger.info(f"Recording completed with {len(total_parts)} parts (PARTIAL)")
-            elif len(total_parts) == 1:
-                total_parts[0].rename(output_file)
-                # Check if recording was marked as interrupted
-                if recording.was_interrupted:
-                    recording.status = 'PARTIAL'
-                    logger.info(f"Recording completed but was interrupted (PARTIAL)")
-                else:
-                    recording.status = 'COMPLETE'
-                    logger.info(f"Recording completed successfully (COMPLETE)")
-            else:
-                recording.status = 'FAILED'
-                logger.error(f"No parts recorded for {recording_id}")
-            
-            if output_file.exists():
-                recording.file_path = str(output_file)
-                recording.file_size = output_file.stat().st_size
-                # Keep original user-specified duration, don't overwrite
-            
-            # Commit status to database BEFORE trying to publish events
-            db.commit()
-            
-            # Try to publish completion event (if this fails, recording status is already saved)
-            try:
-                event_bus.publish('recording.completed', {
-                    'recording_id': recording_id,
-                    'status': recording.status,
-                    'file_path': str(output_file) if output_file.exists() else None,
-                    'file_size': recording.file_size,
-                    'duration': recording.duration
-                })
-                logger.info(f"Published completion event for recording {recording_id}")
-            except Exception as e:
-                logger.error(f"Failed to publish completion event (recording status already saved): {e}")
-            
-            # Create podcast episode if recording is attached to a podcast and completed successfully
-            if recording.podcast_id and recording.status in ['COMPLETE', 'PARTIAL']:
-                self.create_podcast_episode(recording)
-            
-            # Schedule next recurring instance if this was generated from a recurring recording
-            self.schedule_next_recurring_if_needed(recording)
-            
-            # Clean up
-            if recording_id in self.active_recordings:
-                del self.active_recordings[recording_id]
-            
-        except Exception as e:
-            logger.error(f"Recording failed for {recording_id}: {e}")
+        finally:
+            if not launched:
+                self.finish_recording(recording_id)
     
-    def merge_parts(self, parts, output_file):
-        """Merge recording parts using ffmpeg concat"""
+    def finish_stream(self, recording_id, output_file, supervision):
+        """Store the outcome of a finished ffmpeg run and trigger follow-up work"""
         try:
-            # Create concat file
-            concat_file = output_file.parent / f"{output_file.stem}_concat.txt"
-            
-            with open(concat_file, 'w') as f:
-                for part in parts:
-                    f.write(f"file '{part.file_path}'\n")
-            
-            # Run ffmpeg concat
-            cmd = [
-                'ffmpeg', '-f', 'concat', '-safe', '0',
-                '-i', str(concat_file),
-                '-c', 'copy',
-                str(output_file)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            # Clean up concat file
-            concat_file.unlink()
-            
-            return result.returncode == 0
+            returncode, stderr_tail = supervision.result()
             
+            with self.session() as db:
+                recording = db.query(Recording).filter(Recording.id == recording_id).first()
+                
+                # One stat answers both "was anything written" and "how big is it"
+                try:
+                    file_size = os.stat(output_file).st_size
+                except FileNotFoundError:
+                    file_size = None
+                
+                if returncode == 0 and file_size is not None:
+                    recording.file_path = str(output_file)
+                    recording.file_size = file_size
+                    # Keep original user-specified duration, don't overwrite with actual time
+                    
+                    # Set correct status based on whether recording was interrupted
+                    if recording.was_interrupted:
+                        recording.status = 'PARTIAL'
+                        logger.info(f"Recording completed with interruptions (PARTIAL): {file_size} bytes")
+                    else:
+                        recording.status = 'COMPLETE'
+                        logger.info(f"Recording completed successfully: {file_size} bytes, planned duration: {recording.duration}s")
+                else:
+                    recording.status = 'FAILED'
+                    error_msg = "FFmpeg failed"
+                    if stderr_tail:
+                        # ffmpeg prints the cause last, after its banner and progress lines
+                        error_msg = stderr_tail.decode('utf-8', errors='ignore')[-200:]
+                    logger.error(f"Recording failed: {error_msg}")
+                
+                # Commit status to database BEFORE trying to publish events
+                db.commit()
+                
+                # Try to publish completion event (if this fails, recording status is already saved)
+                try:
+                    # pika connections aren't thread-safe; publish from the consumer thread
+                    event_bus.connection.add_callback_threadsafe(partial(event_bus.publish, 'recording.completed', {
+                        'recording_id': recording_id,
+                        'status': recording.status,
+                        'file_size': recording.file_size,
+                        'duration': recording.duration
+                    }))
+                    logger.info(f"Published completion event for recording {recording_id}")
+                except Exception as e:
+                    logger.error(f"Failed to publish completion event (recording status already saved): {e}")
+                
+                # Create podcast episode if recording is attached to a podcast and completed successfully
+                if recording.podcast_id and recording.status in ['COMPLETE', 'PARTIAL']:
+                    self.create_podcast_episode(recording)
+                
+                # Schedule next recurring instance if this was generated from a recurring recording
+                self.schedule_next_recurring_if_needed(recording)
+                
         except Exception as e:
-            logger.error(f"Failed to merge parts: {e}")
-            return False
+            logger.error(f"Recording failed for {recording_id}: {e}")
+            # Mark as failed in database
+            try:
+                with self.session() as db:
+                    recording = db.query(Recording).filter(Recording.id == recording_id).first()
+                    if recording:
+                        recording.status = 'FAILED'
+                        db.commit()
+            except:
+                pass
+        finally:
+            self.finish_recording(recording_id)
     
     def create_podcast_episode(self, recording):
         """Create a podcast episode from a completed recording"""
         try:
             from shared.models import PodcastEpisode, Podcast
             
-            db = next(get_db())
-            
-            # Get podcast details
-            podcast = db.query(Podcast).filter(Podcast.id == recording.podcast_id).first()
-            if not podcast:
-                logger.error(f"Podcast {recording.podcast_id} not found for recording {recording.id}")
-                return
-            
-            # Check if episode already exists
-            existing_episode = db.query(PodcastEpisode).filter(PodcastEpisode.recording_id == recording.id).first()
-            if existing_episode:
-                logger.info(f"Episode already exists for recording {recording.id}")
-                return
-            
-            # Create episode title and description
-            title = recording.name
-            
-            # Format date as "Saturday, 13th of December 2025"
-            day_name = recording.start_time.strftime('%A')
-            day = recording.start_time.day
-            if 4 <= day <= 20 or 24 <= day <= 30:
-                suffix = "th"
-            else:
-                suffix = ["st", "nd", "rd"][day % 10 - 1]
-            month_name = recording.start_time.strftime('%B')
-            year = recording.start_time.year
-            time_str = recording.start_time.strftime('%H:%M')
-            
-            description = f"{recording.name}, recorded on {day_name}, {day}{suffix} of {month_name} {year} at {time_str}"
-            
-            # Create episode
-            episode = PodcastEpisode(
-                podcast_id=recording.podcast_id,
-                recording_id=recording.id,
-                title=title,
-                description=description,
-                pub_date=datetime.utcnow()
-            )
-            
-            db.add(episode)
-            db.commit()
-            
-            logger.info(f"Created podcast episode '{title}' for podcast '{podcast.title}'")
-            
+            with self.session() as db:
+                # Get podcast details
+                podcast = db.query(Podcast).filter(Podcast.id == recording.podcast_id).first()
+                if not podcast:
+                    logger.error(f"Podcast {recording.podcast_id} not found for recording {recording.id}")
+                    return
+                
+                # Check if episode already exists
+                existing_episode = db.query(PodcastEpisode).filter(PodcastEpisode.recording_id == recording.id).first()
+                if existing_episode:
+                    logger.info(f"Episode already exists for recording {recording.id}")
+                    return
+                
+                # Create episode title and description
+                title = recording.name
+                
+                # Format date as "Saturday, 13th of December 2025"
+                day_name = recording.start_time.strftime('%A')
+                day = recording.start_time.day
+                suffix = ORDINAL_SUFFIXES[day]
+                month_name = recording.start_time.strftime('%B')
+                year = recording.start_time.year
+                time_str = recording.start_time.strftime('%H:%M')
+                
+                description = f"{recording.name}, recorded on {day_name}, {day}{suffix} of {month_name} {year} at {time_str}"
+                
+                # Create episode
+                episode = PodcastEpisode(
+                    podcast_id=recording.podcast_id,
+                    recording_id=recording.id,
+                    title=title,
+                    description=description,
+                    pub_date=datetime.utcnow()
+                )
+                
+                db.add(episode)
+                db.commit()
+                
+                logger.info(f"Created podcast episode '{title}' for podcast '{podcast.title}'")
+                
         except Exception as e:
             logger.error(f"Failed to create podcast episode for recording {recording.id}: {e}")
 
-    def calculate_next_recurrence(self, current_time, recurrence_type):
-        """Calculate next occurrence based on recurrence type"""
-        from dateutil.relativedelta import relativedelta
-        
-        if recurrence_type == 'daily':
-            return current_time + timedelta(days=1)
-        
-        elif recurrence_type == 'weekdays':
-            next_time = current_time + timedelta(days=1)
-            # Skip weekends (Saturday=5, Sunday=6)
-            while next_time.weekday() >= 5:
-                next_time += timedelta(days=1)
-            return next_time
-        
-        elif recurrence_type == 'weekends':
-            next_time = current_time + timedelta(days=1)
-            # Skip weekdays (Monday=0 to Friday=4)
-            while next_time.weekday() < 5:
-                next_time += timedelta(days=1)
-            return next_time
-        
-        elif recurrence_type == 'weekly':
-            return current_time + timedelta(weeks=1)
-        
-        elif recurrence_type == 'monthly':
-            return current_time + relativedelta(months=1)
-        
-        else:
-            raise ValueError(f"Unknown recurrence type: {recurrence_type}")
-
     def schedule_next_recurring_if_needed(self, completed_recording):
         """Schedule next instance if this recording was part of a recurring series"""
         try:
-            db = next(get_db())
-            
-            # Find the original recurring template by matching name and station
-            recurring_template = db.query(Recording).filter(
-                Recording.name == completed_recording.name,
-                Recording.station_id == completed_recording.station_id,
-                Recording.is_recurring == True
-            ).first()
-            
-            if not recurring_template:
-                return  # Not part of a recurring series
-            
-            # Check if next instance already exists
-            existing_next = db.query(Recording).filter(
-                Recording.name == recurring_template.name,
-                Recording.station_id == recurring_template.station_id,
-                Recording.is_recurring == False,
-                Recording.start_time > completed_recording.start_time
-            ).first()
-            
-            if existing_next:
-                logger.info(f"Next recurring instance already exists for: {recurring_template.name}")
-                return
-            
-            # Calculate next occurrence using enhanced logic
-            try:
-                next_time = self.calculate_next_recurrence(completed_recording.start_time, recurring_template.recurrence_type)
-            except ValueError as e:
-                logger.error(str(e))
-                return
-            
-            # Check if we've passed the end date
-            if recurring_template.recurrence_end and next_time > recurring_template.recurrence_end:
-                logger.info(f"Recurring recording {recurring_template.name} has reached its end date")
-                return
-            
-            # Create next instance
-            next_recording = Recording(
-                name=recurring_template.name,
-                station_id=recurring_template.station_id,
-                podcast_id=recurring_template.podcast_id,
-                start_time=next_time,
-                end_time=next_time + timedelta(seconds=recurring_template.duration),
-                duration=recurring_template.duration,
-                format=recurring_template.format,
-                bitrate=recurring_template.bitrate,
-                is_recurring=False,
-                save_to_additional_local=recurring_template.save_to_additional_local,
-                save_to_nextcloud=recurring_template.save_to_nextcloud
-            )
-            
-            db.add(next_recording)
-            db.commit()
-            
-            logger.info(f"Scheduled next recurring instance: {recurring_template.name} at {next_time}")
-            
+            with self.session() as db:
+                # Template and any later instance of the series in one round-trip
+                series = db.query(Recording).filter(
+                    Recording.name == completed_recording.name,
+                    Recording.station_id == completed_recording.station_id,
+                    or_(
+                        Recording.is_recurring == True,
+                        Recording.start_time > completed_recording.start_time
+                    )
+                ).all()
+                
+                recurring_template = next((r for r in series if r.is_recurring), None)
+                if not recurring_template:
+                    return  # Not part of a recurring series
+                
+                # Check if next instance already exists
+                if any(not r.is_recurring for r in series):
+                    logger.info(f"Next recurring instance already exists for: {recurring_template.name}")
+                    return
+                
+                # Calculate next occurrence using enhanced logic
+                try:
+                    next_time = calculate_next_recurrence(completed_recording.start_time, recurring_template.recurrence_type)
+                except ValueError as e:
+                    logger.error(str(e))
+                    return
+                
+                # Check if we've passed the end date
+                if recurring_template.recurrence_end and next_time > recurring_template.recurrence_end:
+                    logger.info(f"Recurring recording {recurring_template.name} has reached its end date")
+                    return
+                
+                # Create next instance
+                next_recording = {
+                    'name': recurring_template.name,
+                    'station_id': recurring_template.station_id,
+                    'podcast_id': recurring_template.podcast_id,
+                    'start_time': next_time,
+                    'end_time': next_time + timedelta(seconds=recurring_template.duration),
+                    'duration': recurring_template.duration,
+                    'format': recurring_template.format,
+                    'bitrate': recurring_template.bitrate,
+                    'is_recurring': False,
+                    'save_to_additional_local': recurring_template.save_to_additional_local,
+                    'save_to_nextcloud': recurring_template.save_to_nextcloud
+                }
+                
+                # INSERT ... SELECT ... WHERE NOT EXISTS, so an instance created by another
+                # service since the lookup above is never duplicated
+                columns = Recording.__table__.c
+                result = db.execute(insert(Recording).from_select(
+                    list(next_recording),
+                    select(*(literal(value, columns[key].type) for key, value in next_recording.items())).where(
+                        ~exists().where(
+                            Recording.name == recurring_template.name,
+                            Recording.station_id == recurring_template.station_id,
+                            Recording.is_recurring == False,
+                            Recording.start_time > completed_recording.start_time
+                        )
+                    )
+                ))
+                db.commit()
+                
+                if not result.rowcount:
+                    logger.info(f"Next recurring instance already exists for: {recurring_template.name}")
+                    return
+                
+                logger.info(f"Scheduled next recurring instance: {recurring_template.name} at {next_time}")
+                
+                # The scheduler only sets start jobs for recordings it is told about;
+                # handed to the consumer thread, which owns the pika connection
+                event_bus.connection.add_callback_threadsafe(partial(event_bus.publish, 'recording.schedule', {
+                    'recording_id': result.lastrowid,
+                    'start_time': next_recording['start_time'].isoformat(),
+                    'end_time': next_recording['end_time'].isoformat()
+                }))
+                
         except Exception as e:
             logger.error(f"Failed to schedule next recurring instance: {e}")
 
-    def merge_parts(self, parts, output_file):
-        """Merge recording parts using ffmpeg concat"""
-        try:
-            # Create concat file
-            concat_file = output_file.with_suffix('.txt')
-            with open(concat_file, 'w', encoding='utf-8') as f:
-                for part in parts:
-                    f.write(f"file '{part}'\n")
-            
-            # Merge using ffmpeg
-            cmd = [
-                'ffmpeg', '-y',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', str(concat_file),
-                '-c', 'copy',
-                str(output_file)
-            ]
-            
-            # Run without text decoding to avoid encoding issues
-            result = subprocess.run(cmd, capture_output=True, text=False)
-            
-            if result.returncode == 0:
-                # Clean up
-                concat_file.unlink()
-                for part in parts:
-                    part.unlink()
-                
-                logger.info(f"Merged {len(parts)} parts into {output_file}")
-            else:
-                logger.error(f"Failed to merge parts: FFmpeg returned {result.returncode}")
-            
-        except Exception as e:
-            logger.error(f"Failed to merge parts: {e}")
-    
-    def get_codec(self, format):
-        """Get ffmpeg codec for format"""
-        codecs = {
-            'mp3': 'libmp3lame',
-            'aac': 'aac',
-            'm4a': 'aac',
-            'mp4': 'aac'
-        }
-        return codecs.get(format, 'libmp3lame')
-    
     def run(self):
         logger.info("Recording service starting...")
         try:
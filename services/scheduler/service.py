@@ -1,65 +1,130 @@
 import sys
 import os
+import signal
 import subprocess
 import time
 import json
 import requests
-import threading
+from requests.adapters import HTTPAdapter
+from pika.exceptions import AMQPError, AMQPConnectionError, AMQPChannelError, ChannelClosedByBroker, NackError, UnroutableError
+from collections import deque
+from functools import partial
 from datetime import datetime, timedelta
-from pathlib import Path
-from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.cron import CronTrigger
-from flask import Flask, jsonify
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_REMOVED
+from apscheduler.jobstores.base import JobLookupError
+from sqlalchemy import select, bindparam, func, tuple_
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
 from shared.events import event_bus
-from shared.models import get_db, Recording
+from shared.health import HealthServer
+from shared.models import session_scope, Recording
+from shared.recurrence import calculate_next_recurrence
 
 logger = setup_logger('scheduler')
 
+# Every publish here runs on the consumer thread, so recording.start can wait for the broker's ack
+event_bus.confirm_publishes = True
+
+# Keep-alive connection to the recording service's health endpoint
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+# Seconds a successful recording service health check is trusted for
+RECORDING_READY_TTL = 30
+
+# Messages delivered ahead of acknowledgement, and acknowledged together
+MAX_BATCH_MESSAGES = 64
+
+# scheduler_queue lives in memory; anything lost with a broker restart is picked up by
+# check_active_recordings and check_missing_recurring_instances
+SCHEDULER_QUEUE_ARGUMENTS = {'x-queue-type': 'classic', 'x-max-length': 10000}
+
+# Seconds between attempts to get back a lost RabbitMQ connection
+RECONNECT_DELAY = 5
+
+# Seconds to wait before each retry of an unconfirmed recording.start publish
+PUBLISH_RETRY_DELAYS = (0.1, 0.4, 1.0)
+
+# How far ahead of its start_time a start job may fire; anything earlier is a job left
+# over from before the recording was moved to a later time
+START_EARLY_TOLERANCE = timedelta(minutes=1)
+
+# Statements built once so every check reuses the engine's compiled-SQL cache entry
+ACTIVE_RECORDINGS = select(Recording).where(
+    Recording.start_time <= bindparam('now'),
+    Recording.end_time > bindparam('now'),
+    Recording.status.in_(['SCHEDULED', 'RECORDING'])
+)
+INTERRUPTED_RECORDINGS = select(Recording).where(
+    Recording.status == 'RECORDING',
+    Recording.end_time <= bindparam('now'),
+    Recording.end_time >= bindparam('cutoff')
+)
+UPCOMING_RECORDINGS = select(Recording).where(
+    Recording.status == 'SCHEDULED',
+    Recording.start_time > bindparam('now')
+)
+
 class SchedulerService:
     def __init__(self):
-        self.scheduler = BlockingScheduler()
+        # Start/stop jobs are the only trigger for a recording, so a late wakeup must still run
+        # them (start_recording skips starts that are no longer due); piled-up runs collapse to one
+        self.scheduler = BackgroundScheduler(job_defaults={'misfire_grace_time': None, 'coalesce': True})
         self.event_bus_ready = False
-        logger.info("DEBUG: Created BlockingScheduler")
+        self.health = None
+        self._recording_ready_until = 0
+        # Jobs that fired while the AMQP connection was down; run once it is back
+        self.missed_jobs = deque()
+        # Set by a job that found the channel broken; consume() leaves so run() can rebuild it
+        self.connection_lost = False
+        self.stopping = False
+        logger.debug("Created BackgroundScheduler")
         self.setup_event_handlers()
-        logger.info("DEBUG: Set up event handlers")
+        logger.debug("Set up event handlers")
         self.check_active_recordings()
-        logger.info("DEBUG: Checked active recordings")
+        logger.debug("Checked active recordings")
         
         # Start health check server
         self.start_health_server()
     
     def start_health_server(self):
-        """Start Flask health check server on port 5002"""
-        app = Flask(__name__)
-        
-        @app.route('/health')
-        def health():
-            return jsonify({
-                'status': 'ready' if self.event_bus_ready else 'starting',
-                'event_bus_connected': self.event_bus_ready,
-                'scheduled_jobs': len(self.scheduler.get_jobs())
-            })
-        
-        # Start in background thread
-        def run_health_server():
-            app.run(host='0.0.0.0', port=5002, debug=False)
+        """Start health check server on port 5002"""
+        self.health = HealthServer(5002, self.health_status())
         
-        health_thread = threading.Thread(target=run_health_server, daemon=True)
-        health_thread.start()
+        # Date jobs are removed once they fire, so these two events track the job count
+        self.scheduler.add_listener(self.refresh_health, EVENT_JOB_ADDED | EVENT_JOB_REMOVED)
+    
+    def health_status(self):
+        return {
+            'status': 'ready' if self.event_bus_ready else 'starting',
+            'event_bus_connected': self.event_bus_ready,
+            'scheduled_jobs': len(self.scheduler.get_jobs())
+        }
+    
+    def refresh_health(self, event=None):
+        """Re-encode the health payload after a job or connection change"""
+        if self.health:
+            self.health.set_status(self.health_status())
     
     def check_recording_service_ready(self, max_attempts=10):
         """Check if recording service is ready to receive events"""
+        # Recordings starting together share one check
+        if time.monotonic() < self._recording_ready_until:
+            return True
+        
         for attempt in range(max_attempts):
             try:
-                response = requests.get('http://localhost:5001/health', timeout=2)
+                response = _session.get('http://localhost:5001/health', timeout=2)
                 if response.status_code == 200:
                     data = response.json()
                     if data.get('status') == 'ready':
+                        self._recording_ready_until = time.monotonic() + RECORDING_READY_TTL
                         return True
                 logger.info(f"Recording service not ready, attempt {attempt + 1}/{max_attempts}")
                 time.sleep(1)
@@ -71,112 +136,210 @@ class SchedulerService:
         return False
     
     def setup_event_handlers(self):
-        logger.info("DEBUG: Setting up event handlers")
+        logger.debug("Setting up event handlers")
         
         # Create a dedicated queue for scheduler
         try:
             event_bus.connect()  # Connect when setting up
-            result = event_bus.channel.queue_declare(queue='scheduler_queue', durable=True)
-            event_bus.channel.queue_bind(exchange='webradio9', queue='scheduler_queue', routing_key='recording.schedule')
-            event_bus.channel.queue_bind(exchange='webradio9', queue='scheduler_queue', routing_key='recording.cancel')
-            logger.info("DEBUG: Created scheduler_queue")
+            self.declare_queue()
+            event_bus.channel.basic_qos(prefetch_count=MAX_BATCH_MESSAGES)
+            logger.debug("scheduler_queue ready")
             self.event_bus_ready = True
         except Exception as e:
             logger.error(f"Failed to setup queue: {e}")
             self.event_bus_ready = False
         
-        logger.info("DEBUG: Event handlers set up")
+        logger.debug("Event handlers set up")
     
-    def check_active_recordings(self):
-        """Check for recordings that should be active now or were interrupted"""
+    def declare_queue(self):
+        """Make sure scheduler_queue exists, declaring and binding it only when the broker lacks it"""
         try:
-            db = next(get_db())
-            now = datetime.now()
+            # One round-trip on every start and reconnect after the first
+            event_bus.channel.queue_declare(queue='scheduler_queue', passive=True)
+            return
+        except ChannelClosedByBroker:
+            # NOT_FOUND closes the channel
+            event_bus.reopen_channel()
+        
+        logger.info("Declaring scheduler_queue")
+        event_bus.channel.queue_declare(queue='scheduler_queue', durable=False, arguments=SCHEDULER_QUEUE_ARGUMENTS)
+        event_bus.channel.queue_bind(exchange='webradio9', queue='scheduler_queue', routing_key='recording.schedule')
+        event_bus.channel.queue_bind(exchange='webradio9', queue='scheduler_queue', routing_key='recording.cancel')
+    
+    def on_message(self, channel, method, properties, body):
+        """Dispatch a pushed scheduler_queue message by routing key"""
+        message = json.loads(body)
+        if method.routing_key == 'recording.schedule':
+            self.handle_recording_schedule(message)
+        elif method.routing_key == 'recording.cancel':
+            self.handle_recording_cancel(message)
+    
+    def consume(self):
+        """Handle scheduler_queue messages, acknowledging them in batches"""
+        unacked = 0
+        last_tag = None
+        
+        if self.connection_lost:
+            raise AMQPConnectionError("Channel lost before consuming")
+        
+        # Yields (None, None, None) once the queue has been quiet for a second;
+        # waiting also runs the jobs handed over by run_on_consumer
+        for method, properties, body in event_bus.channel.consume('scheduler_queue', inactivity_timeout=1):
+            if method:
+                try:
+                    self.on_message(event_bus.channel, method, properties, body)
+                except Exception as e:
+                    logger.error(f"Failed to handle {method.routing_key} message: {e}")
+                last_tag = method.delivery_tag
+                unacked += 1
             
-            # Find recordings that should be recording now
-            active_recordings = db.query(Recording).filter(
-                Recording.start_time <= now,
-                Recording.end_time > now,
-                Recording.status.in_(['SCHEDULED', 'RECORDING'])
-            ).all()
+            # A job broke the channel; its unacked messages are redelivered on the new one
+            if self.connection_lost:
+                raise AMQPConnectionError("Channel lost while publishing")
             
-            # Also find interrupted recordings (status=RECORDING but end_time in recent past)
-            recent_cutoff = now - timedelta(minutes=30)  # Look back 30 minutes
-            interrupted_recordings = db.query(Recording).filter(
-                Recording.status == 'RECORDING',
-                Recording.end_time <= now,
-                Recording.end_time >= recent_cutoff
-            ).all()
+            # One ack frame covers the whole batch; handlers are idempotent if a crash redelivers it
+            if unacked and (not method or unacked >= MAX_BATCH_MESSAGES or self.stopping):
+                event_bus.channel.basic_ack(delivery_tag=last_tag, multiple=True)
+                unacked = 0
             
-            # Process active recordings
-            for recording in active_recordings:
-                if recording.status == 'RECORDING':
-                    logger.info(f"Found interrupted recording, restarting: {recording.name}")
-                    # Mark as interrupted for proper status tracking
+            if self.stopping:
+                event_bus.channel.cancel()
+                return
+    
+    def request_stop(self, signum, frame):
+        """Signal handler; the consumer notices within a second and shuts down cleanly"""
+        self.stopping = True
+    
+    def add_job(self, func, trigger, args=(), **kwargs):
+        """Schedule func to run on the consumer thread"""
+        return self.scheduler.add_job(self.run_on_consumer, trigger, args=[func, *args], **kwargs)
+    
+    def run_on_consumer(self, func, *args):
+        """Hand a job to the thread that owns the AMQP connection; pika connections aren't thread-safe"""
+        job = partial(func, *args)
+        try:
+            event_bus.connection.add_callback_threadsafe(job)
+        except AMQPConnectionError:
+            self.missed_jobs.append(job)
+    
+    def reconnect(self):
+        """Reopen the connection and scheduler_queue consumer, then run the jobs that fired meanwhile"""
+        self.event_bus_ready = False
+        self.connection_lost = False
+        self.refresh_health()
+        # Outside any pika callback, so closing the old connection is safe here
+        event_bus.disconnect()
+        while not self.event_bus_ready and not self.stopping:
+            time.sleep(RECONNECT_DELAY)
+            self.setup_event_handlers()
+        self.refresh_health()
+        
+        # A job that loses the channel again re-queues itself; consume() then reconnects once more
+        while self.missed_jobs and not self.connection_lost:
+            self.missed_jobs.popleft()()
+    
+    def check_active_recordings(self, now=None):
+        """Check for recordings that should be active now or were interrupted"""
+        # Stored times are naive local time, as entered in the web UI
+        now = now or datetime.now()
+        try:
+            with session_scope() as db:
+                # Find recordings that should be recording now
+                active_recordings = db.execute(ACTIVE_RECORDINGS, {'now': now}).scalars().all()
+                
+                # Also find interrupted recordings (status=RECORDING but end_time in recent past)
+                recent_cutoff = now - timedelta(minutes=30)  # Look back 30 minutes
+                interrupted_recordings = db.execute(
+                    INTERRUPTED_RECORDINGS, {'now': now, 'cutoff': recent_cutoff}
+                ).scalars().all()
+                
+                # Future recordings get their start/stop jobs here; after that APScheduler wakes us
+                upcoming_recordings = db.execute(UPCOMING_RECORDINGS, {'now': now}).scalars().all()
+                
+                # Process active recordings
+                for recording in active_recordings:
+                    if recording.status == 'RECORDING':
+                        logger.info(f"Found interrupted recording, restarting: {recording.name}")
+                        # Mark as interrupted for proper status tracking
+                        recording.was_interrupted = True
+                    else:
+                        logger.info(f"Found active recording: {recording.name}")
+                
+                # Process interrupted recordings that ended while services were down
+                for recording in interrupted_recordings:
+                    logger.info(f"Found abandoned recording, marking as PARTIAL: {recording.name}")
                     recording.was_interrupted = True
-                    db.commit()
-                else:
-                    logger.info(f"Found active recording: {recording.name}")
+                    # Check if any file was created
+                    try:
+                        file_stat = os.stat(recording.file_path)
+                    except (FileNotFoundError, TypeError):
+                        recording.status = 'FAILED'
+                        logger.info(f"Marked as FAILED (no file created)")
+                    else:
+                        recording.status = 'PARTIAL'
+                        recording.file_size = file_stat.st_size
+                        logger.info(f"Marked as PARTIAL with {recording.file_size} bytes")
+            
+            # Every status change above is committed in one go before any start runs in its own session
+            for recording in active_recordings:
                 self.start_recording(recording.id)
             
-            # Process interrupted recordings that ended while services were down
-            for recording in interrupted_recordings:
-                logger.info(f"Found abandoned recording, marking as PARTIAL: {recording.name}")
-                recording.was_interrupted = True
-                # Check if any file was created
-                if recording.file_path and Path(recording.file_path).exists():
-                    recording.status = 'PARTIAL'
-                    recording.file_size = Path(recording.file_path).stat().st_size
-                    logger.info(f"Marked as PARTIAL with {recording.file_size} bytes")
-                else:
-                    recording.status = 'FAILED'
-                    logger.info(f"Marked as FAILED (no file created)")
-                db.commit()
-                
+            for recording in upcoming_recordings:
+                self.schedule_recording(recording.id, recording.start_time, recording.end_time, now)
+                    
         except Exception as e:
             logger.error(f"Error checking active recordings: {e}")
     
     def handle_recording_schedule(self, message):
         """Schedule a new recording"""
         try:
-            recording_id = message['recording_id']
-            start_time = datetime.fromisoformat(message['start_time'])
-            end_time = datetime.fromisoformat(message['end_time'])
-            
-            logger.info(f"Scheduling recording {recording_id} from {start_time} to {end_time}")
-            
-            # Check if recording should start immediately
-            now = datetime.now()
-            if start_time <= now <= end_time:
-                logger.info(f"Recording {recording_id} should start immediately")
-                self.start_recording(recording_id)
-                return
-            
-            # Schedule start
-            if start_time > now:
-                self.scheduler.add_job(
-                    func=self.start_recording,
-                    trigger=DateTrigger(run_date=start_time),
-                    args=[recording_id],
-                    id=f"start_{recording_id}",
-                    replace_existing=True
-                )
-                logger.info(f"Scheduled start job for recording {recording_id} at {start_time}")
-            
-            # Schedule end
-            if end_time > now:
-                self.scheduler.add_job(
-                    func=self.stop_recording,
-                    trigger=DateTrigger(run_date=end_time),
-                    args=[recording_id],
-                    id=f"stop_{recording_id}",
-                    replace_existing=True
-                )
-                logger.info(f"Scheduled stop job for recording {recording_id} at {end_time}")
-            
+            self.schedule_recording(
+                message['recording_id'],
+                datetime.fromisoformat(message['start_time']),
+                datetime.fromisoformat(message['end_time'])
+            )
         except Exception as e:
             logger.error(f"Failed to schedule recording: {e}")
     
+    def schedule_recording(self, recording_id, start_time, end_time, now=None):
+        """Add the start and stop jobs for a recording, or start it now if it is already due"""
+        logger.info(f"Scheduling recording {recording_id} from {start_time} to {end_time}")
+        
+        # Check if recording should start immediately
+        now = now or datetime.now()
+        if start_time <= now <= end_time:
+            logger.info(f"Recording {recording_id} should start immediately")
+            # Drop jobs left from earlier times so they don't start or stop it again
+            for job_id in (f"start_{recording_id}", f"stop_{recording_id}"):
+                try:
+                    self.scheduler.remove_job(job_id)
+                except JobLookupError:
+                    pass
+            self.start_recording(recording_id)
+            return
+        
+        # Schedule start
+        if start_time > now:
+            self.add_job(
+                func=self.start_recording,
+                trigger=DateTrigger(run_date=start_time),
+                args=[recording_id],
+                id=f"start_{recording_id}",
+                replace_existing=True
+            )
+            logger.info(f"Scheduled start job for recording {recording_id} at {start_time}")
+        
+        # Schedule end
+        if end_time > now:
+            self.add_job(
+                func=self.stop_recording,
+                trigger=DateTrigger(run_date=end_time),
+                args=[recording_id],
+                id=f"stop_{recording_id}",
+                replace_existing=True
+            )
+            logger.info(f"Scheduled stop job for recording {recording_id} at {end_time}")
+    
     def handle_recording_cancel(self, message):
         """Cancel a scheduled recording"""
         try:
@@ -196,63 +359,73 @@ class SchedulerService:
     def start_recording(self, recording_id):
         """Start a recording with health check and retry logic"""
         try:
-            logger.info(f"DEBUG: start_recording called for ID {recording_id}")
-            
-            db = next(get_db())
-            logger.info(f"DEBUG: Got database connection")
+            logger.debug("start_recording called for ID %s", recording_id)
             
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
-            logger.info(f"DEBUG: Queried recording, found: {recording is not None}")
-            
-            if recording and recording.status in ['SCHEDULED', 'RECORDING']:
-                logger.info(f"DEBUG: Recording status is {recording.status}, updating to RECORDING")
-                recording.status = 'RECORDING'
-                db.commit()
-                logger.info(f"DEBUG: Status updated to RECORDING")
+            with session_scope() as db:
+                recording = db.query(Recording).filter(Recording.id == recording_id).first()
+                logger.debug("Queried recording %s, found: %s", recording_id, recording is not None)
                 
-                # Check if recording service is ready
-                logger.info("Checking recording service health...")
-                if not self.check_recording_service_ready():
-                    logger.error(f"Recording service not ready, marking recording {recording_id} as FAILED")
-                    recording.status = 'FAILED'
-                    db.commit()
+                # A stale job for times the recording was edited away from must not start it
+                now = datetime.now()
+                if recording and not (recording.start_time - START_EARLY_TOLERANCE <= now < recording.end_time):
+                    logger.warning(f"Recording {recording_id} is not due (scheduled {recording.start_time} to {recording.end_time}), skipping stale start")
                     return
                 
-                # Publish event with retry logic
-                event_data = {
-                    'recording_id': recording_id,
-                    'station_id': recording.station_id,
-                    'name': recording.name,
-                    'format': recording.format,
-                    'bitrate': recording.bitrate,
-                    'end_time': recording.end_time.isoformat()
-                }
-                
-                # Retry publishing up to 3 times
-                for attempt in range(3):
-                    try:
-                        logger.info(f"DEBUG: Publishing recording.start event (attempt {attempt + 1})")
-                        event_bus.publish('recording.start', event_data)
-                        logger.info(f"DEBUG: Published recording.start event successfully")
-                        break
-                    except Exception as e:
-                        logger.warning(f"Event publish attempt {attempt + 1} failed: {e}")
-                        if attempt == 2:  # Last attempt
-                            logger.error(f"Failed to publish event after 3 attempts, marking as FAILED")
-                            recording.status = 'FAILED'
-                            db.commit()
+                if recording and recording.status in ['SCHEDULED', 'RECORDING']:
+                    logger.debug("Recording status is %s, updating to RECORDING", recording.status)
+                    recording.status = 'RECORDING'
+                    db.commit()
+                    logger.debug("Status updated to RECORDING")
+                    
+                    # Check if recording service is ready
+                    logger.info("Checking recording service health...")
+                    if not self.check_recording_service_ready():
+                        logger.error(f"Recording service not ready, marking recording {recording_id} as FAILED")
+                        recording.status = 'FAILED'
+                        return
+                    
+                    # Publish event with retry logic
+                    event_data = {
+                        'recording_id': recording_id,
+                        'station_id': recording.station_id,
+                        'name': recording.name,
+                        'format': recording.format,
+                        'bitrate': recording.bitrate,
+                        'end_time': recording.end_time.isoformat()
+                    }
+                    
+                    # The broker confirms each publish, so a failure shows up within a round-trip;
+                    # a nack or unroutable return is retried on the same channel with a short backoff
+                    attempts = len(PUBLISH_RETRY_DELAYS) + 1
+                    for attempt in range(1, attempts + 1):
+                        try:
+                            logger.debug("Publishing recording.start event (attempt %s)", attempt)
+                            event_bus.publish('recording.start', event_data)
+                            logger.debug("Published recording.start event successfully")
+                            break
+                        except (NackError, UnroutableError) as e:
+                            logger.warning(f"Event publish attempt {attempt} failed: {e}")
+                            if attempt == attempts:
+                                logger.error(f"Failed to publish event after {attempts} attempts, marking as FAILED")
+                                recording.status = 'FAILED'
+                                return
+                            time.sleep(PUBLISH_RETRY_DELAYS[attempt - 1])
+                        except AMQPError as e:
+                            # This runs on the consumer thread, inside the consume() generator, so the
+                            # connection can't be replaced here; consume() leaves, run() rebuilds the
+                            # queue and consumer, then retries this start with the other missed jobs
+                            logger.warning(f"Channel lost publishing recording.start for {recording_id}, retrying after reconnect: {e}")
+                            self.missed_jobs.append(partial(self.start_recording, recording_id))
+                            self.connection_lost = True
                             return
-                        time.sleep(1)  # Wait before retry
-                
-                logger.info(f"Started recording: {recording.name}")
-            else:
-                logger.warning(f"DEBUG: Recording not found or not schedulable. Recording exists: {recording is not None}, Status: {recording.status if recording else 'N/A'}")
-                
+                    
+                    logger.info(f"Started recording: {recording.name}")
+                else:
+                    logger.warning("Recording %s not found or not schedulable (status: %s)", recording_id, recording.status if recording else 'N/A')
+                    
         except Exception as e:
             logger.error(f"Failed to start recording {recording_id}: {e}")
-            logger.error(f"DEBUG: Exception type: {type(e)}")
-            import traceback
-            logger.error(f"DEBUG: Full traceback: {traceback.format_exc()}")
+            logger.debug("Start failure traceback for %s", recording_id, exc_info=True)
     
     def stop_recording(self, recording_id):
         """Stop a recording"""
@@ -266,83 +439,62 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Failed to stop recording {recording_id}: {e}")
     
-    def calculate_next_recurrence(self, current_time, recurrence_type):
-        """Calculate next occurrence based on recurrence type"""
-        from dateutil.relativedelta import relativedelta
-        
-        if recurrence_type == 'daily':
-            return current_time + timedelta(days=1)
-        
-        elif recurrence_type == 'weekdays':
-            next_time = current_time + timedelta(days=1)
-            # Skip weekends (Saturday=5, Sunday=6)
-            while next_time.weekday() >= 5:
-                next_time += timedelta(days=1)
-            return next_time
-        
-        elif recurrence_type == 'weekends':
-            next_time = current_time + timedelta(days=1)
-            # Skip weekdays (Monday=0 to Friday=4)
-            while next_time.weekday() < 5:
-                next_time += timedelta(days=1)
-            return next_time
-        
-        elif recurrence_type == 'weekly':
-            return current_time + timedelta(weeks=1)
-        
-        elif recurrence_type == 'monthly':
-            return current_time + relativedelta(months=1)
-        
-        else:
-            raise ValueError(f"Unknown recurrence type: {recurrence_type}")
-
-    def check_missing_recurring_instances(self):
+    def check_missing_recurring_instances(self, now=None):
         """Fallback check for recurring recordings missing their next instance"""
+        # Local time like the stored start times; utcnow() shifted the 48 hour window by the UTC offset
+        now = now or datetime.now()
         try:
-            db = next(get_db())
-            
-            # Find all recurring templates
-            recurring_templates = db.query(Recording).filter(Recording.is_recurring == True).all()
-            
-            for template in recurring_templates:
-                # Find the latest instance (completed or scheduled) for this recurring series
-                latest_instance = db.query(Recording).filter(
-                    Recording.name == template.name,
-                    Recording.station_id == template.station_id,
-                    Recording.is_recurring == False
-                ).order_by(Recording.start_time.desc()).first()
-                
-                # If no instances exist, use the template as base
-                base_time = latest_instance.start_time if latest_instance else template.start_time
-                
-                # Calculate next occurrence using enhanced logic
-                try:
-                    next_time = self.calculate_next_recurrence(base_time, template.recurrence_type)
-                except ValueError as e:
-                    logger.error(str(e))
-                    continue
+            with session_scope() as db:
+                # Find all recurring templates
+                recurring_templates = db.query(Recording).filter(Recording.is_recurring == True).all()
                 
-                # Check if we've passed the end date
-                if template.recurrence_end and next_time > template.recurrence_end:
-                    continue
+                # Latest instance (completed or scheduled) of every series in one grouped query
+                latest_starts = dict(((name, station_id), latest) for name, station_id, latest in db.query(
+                    Recording.name, Recording.station_id, func.max(Recording.start_time)
+                ).filter(
+                    Recording.is_recurring == False
+                ).group_by(Recording.name, Recording.station_id))
                 
                 # Only create if next occurrence is within next 48 hours
-                now = datetime.utcnow()
                 check_until = now + timedelta(hours=48)
-                if next_time > check_until:
-                    continue
                 
-                # Check if instance already exists for this time
-                existing = db.query(Recording).filter(
-                    Recording.name == template.name,
-                    Recording.station_id == template.station_id,
+                candidates = {}
+                for template in recurring_templates:
+                    # If no instances exist, use the template as base
+                    base_time = latest_starts.get((template.name, template.station_id), template.start_time)
+                    
+                    # Calculate next occurrence using enhanced logic
+                    try:
+                        next_time = calculate_next_recurrence(base_time, template.recurrence_type)
+                    except ValueError as e:
+                        logger.error(str(e))
+                        continue
+                    
+                    # Check if we've passed the end date
+                    if template.recurrence_end and next_time > template.recurrence_end:
+                        continue
+                    
+                    if next_time > check_until:
+                        continue
+                    
+                    candidates[(template.name, template.station_id, next_time)] = template
+                
+                if not candidates:
+                    return
+                
+                # Drop candidates whose instance already exists, with one lookup for all of them
+                existing = set(db.query(Recording.name, Recording.station_id, Recording.start_time).filter(
                     Recording.is_recurring == False,
-                    Recording.start_time == next_time
-                ).first()
+                    tuple_(Recording.name, Recording.station_id, Recording.start_time).in_(list(candidates))
+                ))
                 
-                if not existing:
+                created = []
+                for (name, station_id, next_time), template in candidates.items():
+                    if (name, station_id, next_time) in existing:
+                        continue
+                    
                     # Create missing instance
-                    next_recording = Recording(
+                    created.append(Recording(
                         name=template.name,
                         station_id=template.station_id,
                         podcast_id=template.podcast_id,
@@ -354,91 +506,57 @@ class SchedulerService:
                         is_recurring=False,
                         save_to_additional_local=template.save_to_additional_local,
                         save_to_nextcloud=template.save_to_nextcloud
-                    )
-                    
-                    db.add(next_recording)
+                    ))
                     logger.info(f"Created missing recurring instance: {template.name} at {next_time}")
+                
+                if not created:
+                    return
+                
+                # return_defaults fills in the ids the start/stop jobs are keyed on
+                db.bulk_save_objects(created, return_defaults=True)
             
-            db.commit()
-            
+            for recording in created:
+                self.schedule_recording(recording.id, recording.start_time, recording.end_time, now)
+                
         except Exception as e:
             logger.error(f"Error checking missing recurring instances: {e}")
     
     def run(self):
         logger.info("Scheduler service starting...")
         
-        # Use simple polling instead of complex threading + event consumption
-        import time
+        # Schedule messages are pushed to on_message; timed work comes from APScheduler
+        self.add_job(
+            func=self.check_missing_recurring_instances,
+            trigger=IntervalTrigger(minutes=30),
+            id='check_missing_recurring_instances',
+            next_run_time=datetime.now()
+        )
+        self.scheduler.start()
         
-        last_recurring_check = 0
-        recurring_check_interval = 1800  # 30 minutes in seconds
+        # run_services stops us with SIGTERM; finish the current message and ack it first
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
         
-        while True:
-            try:
-                current_time = time.time()
-                
-                # Check for new schedule events (non-blocking)
-                self.check_for_schedule_events()
-                
-                # Check for recordings that should start now
-                self.check_recordings_to_start()
-                
-                # Check for missing recurring instances every 30 minutes
-                if current_time - last_recurring_check > recurring_check_interval:
-                    self.check_missing_recurring_instances()
-                    last_recurring_check = current_time
-                
-                # Sleep for 1 second before next check
-                time.sleep(1)
-                
-            except KeyboardInterrupt:
-                logger.info("Scheduler service stopping...")
-                self.scheduler.shutdown()
-                break
-            except Exception as e:
-                logger.error(f"Scheduler error: {e}")
-                time.sleep(5)  # Wait before retrying
-    
-    def check_for_schedule_events(self):
-        """Check for new recording schedule events without blocking"""
-        try:
-            # Ensure connection
-            event_bus.connect()
-            
-            # Try to get a message without blocking
-            method_frame, header_frame, body = event_bus.channel.basic_get(queue='scheduler_queue', auto_ack=True)
-            
-            if method_frame:
-                message = json.loads(body)
-                if method_frame.routing_key == 'recording.schedule':
-                    self.handle_recording_schedule(message)
-                elif method_frame.routing_key == 'recording.cancel':
-                    self.handle_recording_cancel(message)
-                    
-        except Exception as e:
-            # No message available or connection issue - ignore
-            pass
-    
-    def check_recordings_to_start(self):
-        """Check database for recordings that should start now"""
         try:
-            from datetime import datetime
-            db = next(get_db())
-            now = datetime.now()
-            
-            # Find recordings that should start now (within 5 seconds)
-            recordings_to_start = db.query(Recording).filter(
-                Recording.status == 'SCHEDULED',
-                Recording.start_time <= now,
-                Recording.start_time >= now - timedelta(seconds=5)
-            ).all()
-            
-            for recording in recordings_to_start:
-                logger.info(f"Starting overdue recording: {recording.name}")
-                self.start_recording(recording.id)
-                
+            # The channel set up in __init__ is held for the life of the service and only
+            # replaced when the connection drops
+            while not self.stopping:
+                try:
+                    self.consume()
+                except (AMQPConnectionError, AMQPChannelError) as e:
+                    if self.stopping:
+                        break
+                    logger.warning(f"Lost RabbitMQ connection, reconnecting: {e}")
+                    self.reconnect()
+            logger.info("Scheduler service stopping...")
         except Exception as e:
-            logger.error(f"Error checking recordings to start: {e}")
+            logger.error(f"Scheduler error: {e}")
+        finally:
+            self.scheduler.shutdown(wait=False)
+            try:
+                event_bus.connection.close()
+            except Exception:
+                pass
 
 if __name__ == "__main__":
     service = SchedulerService()
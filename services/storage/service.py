@@ -1,43 +1,153 @@
 import sys
 import os
 import shutil
-import requests
 import threading
+import requests
+import http.client
+from base64 import b64encode
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.utils import requote_uri
+from urllib3.util import Retry
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, jsonify
+from sqlalchemy import select, update, bindparam
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
 from shared.events import event_bus
-from shared.models import get_db, Recording
+from shared.health import HealthServer
+from shared.models import session_scope, Recording
 
 logger = setup_logger('storage')
 
+# Transient NextCloud errors on the directory requests are retried with backoff. PUT is
+# left out: a failed upload is reported as FAILED and not retried (see project.md)
+WEBDAV_RETRY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['HEAD', 'PROPFIND', 'MKCOL']),
+    raise_on_status=False
+)
+
+# Keep-alive connections to NextCloud, shared by uploads and directory creation
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=WEBDAV_RETRY))
+_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=WEBDAV_RETRY))
+
+# Just the columns storage needs, built once so each event reuses the compiled statement
+COMPLETED_RECORDING = select(
+    Recording.id,
+    Recording.file_path,
+    Recording.name,
+    Recording.start_time,
+    Recording.save_to_additional_local,
+    Recording.save_to_nextcloud,
+    Recording.nextcloud_base_dir
+).where(Recording.id == bindparam('recording_id'))
+
+# Stale rows fetched per round-trip while cleanup streams through them
+CLEANUP_FETCH_SIZE = 1000
+
+# Recording ids per cleanup UPDATE, well under the driver's bind parameter limits
+CLEANUP_BATCH_SIZE = 32000
+
+# Bytes read from a recording per write to the upload socket
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def copy_file(src, dst):
+    """Copy src to dst in-kernel, then carry over its timestamps and mode like shutil.copy2"""
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        remaining = os.fstat(source.fileno()).st_size
+        try:
+            # copy_file_range can reflink on XFS/Btrfs and never surfaces the data in userspace
+            while remaining > 0:
+                copied = os.copy_file_range(source.fileno(), target.fileno(), remaining)
+                if not copied:
+                    break
+                remaining -= copied
+        except OSError:
+            # Cross-filesystem on older kernels, or unsupported by the filesystem; sendfile
+            # continues from wherever copy_file_range left both file offsets
+            offset = source.tell()
+            while remaining > 0:
+                sent = os.sendfile(target.fileno(), source.fileno(), offset, remaining)
+                if not sent:
+                    break
+                offset += sent
+                remaining -= sent
+    shutil.copystat(src, dst)
+
+def basic_auth_header(username, password):
+    """Encode credentials as an HTTP Basic Authorization header value"""
+    return 'Basic ' + b64encode(f"{username}:{password}".encode()).decode()
+
+def sendfile_put(url, source_file, authorization):
+    """PUT a file over plain HTTP, letting the kernel move the bytes from disk to the socket"""
+    parts = urlsplit(requote_uri(url))
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=300)
+    try:
+        conn.putrequest('PUT', parts.path)
+        conn.putheader('Authorization', authorization)
+        with open(source_file, 'rb') as f:
+            conn.putheader('Content-Length', str(os.fstat(f.fileno()).st_size))
+            conn.endheaders()
+            # socket.sendfile uses os.sendfile and copes with the socket timeout
+            conn.sock.sendfile(f)
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+def read_chunks(source_file):
+    """Yield the file in large unbuffered reads"""
+    with open(source_file, 'rb', buffering=0) as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
 class StorageService:
     def __init__(self):
         self.event_bus_ready = False
+        # Remote directories known to exist, so repeat uploads skip the WebDAV round-trips
+        self.ensured_dirs = set()
+        # Sized to the session's connection pool
+        self.mkcol_pool = ThreadPoolExecutor(4, thread_name_prefix='mkcol')
+        # Copies and uploads of different recordings overlap; the worker count caps what's in flight
+        self.storage_pool = ThreadPoolExecutor(
+            config.getint('storage', 'concurrency', fallback=4), thread_name_prefix='store'
+        )
+        # Recordings a worker is still copying or uploading; cleanup must not delete their files
+        self.in_flight = set()
+        self.in_flight_lock = threading.Lock()
+        # Workers finishing together run their cleanups one at a time
+        self.cleanup_lock = threading.Lock()
+        # Storage settings, read once rather than on every event
+        self.additional_folder = config.get('storage', 'additional_local_folder')
+        self.keep_count = config.getint('storage', 'keep_recordings_count')
+        self.nextcloud_url = config.get('storage', 'nextcloud_url')
+        self.nextcloud_credentials = (
+            config.get('storage', 'nextcloud_username'),
+            config.get('storage', 'nextcloud_password')
+        )
+        # WebDAV root for the configured user; request URLs are this plus the remote path
+        self.dav_url = (
+            f"{self.nextcloud_url.rstrip('/')}/remote.php/dav/files/{self.nextcloud_credentials[0]}"
+            if self.nextcloud_url else None
+        )
+        # Every NextCloud request authenticates as the same user, so encode the header once
+        self.authorization = basic_auth_header(*self.nextcloud_credentials)
+        _session.headers['Authorization'] = self.authorization
         self.setup_event_handlers()
         self.start_health_server()
     
     def start_health_server(self):
-        """Start Flask health check server on port 5004"""
-        app = Flask(__name__)
-        
-        @app.route('/health')
-        def health():
-            return jsonify({
-                'status': 'ready' if self.event_bus_ready else 'starting',
-                'event_bus_connected': self.event_bus_ready
-            })
-        
-        # Start in background thread
-        def run_health_server():
-            app.run(host='0.0.0.0', port=5004, debug=False)
-        
-        health_thread = threading.Thread(target=run_health_server, daemon=True)
-        health_thread.start()
+        """Start health check server on port 5004"""
+        self.health = HealthServer(5004, {
+            'status': 'ready' if self.event_bus_ready else 'starting',
+            'event_bus_connected': self.event_bus_ready
+        })
     
     def setup_event_handlers(self):
         try:
@@ -49,128 +159,168 @@ class StorageService:
             self.event_bus_ready = False
     
     def handle_recording_completed(self, message):
+        """Hand a completed recording to the storage workers"""
+        if message['status'] == 'FAILED':
+            return
+        
+        # Marked before the worker starts, so no cleanup in between can remove the file
+        with self.in_flight_lock:
+            self.in_flight.add(message['recording_id'])
+        self.storage_pool.submit(self.store_recording, message['recording_id'])
+    
+    def store_recording(self, recording_id):
         """Handle completed recording storage"""
         try:
-            recording_id = message['recording_id']
-            status = message['status']
-            
-            if status == 'FAILED':
-                return
-            
-            db = next(get_db())
-            recording = db.query(Recording).filter(Recording.id == recording_id).first()
-            
-            if not recording or not recording.file_path:
-                return
-            
-            source_file = Path(recording.file_path)
-            
-            # Copy to additional local folder
-            if recording.save_to_additional_local:
-                self.copy_to_additional_local(recording, source_file, db)
-            
-            # Upload to NextCloud
-            if recording.save_to_nextcloud:
-                self.upload_to_nextcloud(recording, source_file, db)
-            
-            # Handle cleanup if keep_recordings_count is set
-            keep_count = config.getint('storage', 'keep_recordings_count')
-            if keep_count > 0:
-                self.cleanup_old_recordings(keep_count, db)
-            
+            # Each worker gets its own session from session_scope
+            with session_scope() as db:
+                recording = db.execute(COMPLETED_RECORDING, {'recording_id': recording_id}).first()
+                
+                if not recording or not recording.file_path:
+                    return
+                
+                source_file = Path(recording.file_path)
+                
+                # Hierarchical folders and dated filename, shared by both destinations
+                start_date = recording.start_time
+                folders = (recording.name, str(start_date.year), start_date.strftime('%m-%b'))
+                filename = f"{recording.name}{start_date.strftime('%y%m%d-%a')}{source_file.suffix}"
+                
+                statuses = {}
+                
+                # Copy to additional local folder
+                if recording.save_to_additional_local:
+                    statuses['local_storage_status'] = self.copy_to_additional_local(source_file, folders, filename)
+                
+                # Upload to NextCloud
+                if recording.save_to_nextcloud:
+                    statuses['nextcloud_storage_status'] = self.upload_to_nextcloud(recording, source_file, folders, filename)
+                
+                # Both outcomes in one UPDATE; a skipped destination keeps its current status
+                statuses = {column: value for column, value in statuses.items() if value}
+                if statuses:
+                    db.execute(update(Recording).where(Recording.id == recording.id).values(**statuses))
+                
+                # Handle cleanup if keep_recordings_count is set
+                if self.keep_count > 0:
+                    with self.cleanup_lock:
+                        self.cleanup_old_recordings(self.keep_count, db)
+                
         except Exception as e:
             logger.error(f"Storage handling failed: {e}")
+        finally:
+            with self.in_flight_lock:
+                self.in_flight.discard(recording_id)
     
-    def copy_to_additional_local(self, recording, source_file, db):
-        """Copy recording to additional local folder"""
+    def copy_to_additional_local(self, source_file, folders, filename):
+        """Copy recording to additional local folder; returns the storage status, or None if not configured"""
         try:
-            additional_folder = config.get('storage', 'additional_local_folder')
-            if not additional_folder:
+            if not self.additional_folder:
                 return
             
             # Create hierarchical path
-            start_date = recording.start_time
-            folder_path = Path(additional_folder) / recording.name / str(start_date.year) / f"{start_date.strftime('%m-%b')}"
+            folder_path = Path(self.additional_folder, *folders)
             folder_path.mkdir(parents=True, exist_ok=True)
             
-            # Create filename with date
-            filename = f"{recording.name}{start_date.strftime('%y%m%d-%a')}{source_file.suffix}"
             dest_file = folder_path / filename
             
-            shutil.copy2(source_file, dest_file)
-            recording.local_storage_status = 'SUCCESS'
+            copy_file(source_file, dest_file)
             
             logger.info(f"Copied recording to additional local: {dest_file}")
+            return 'SUCCESS'
             
         except Exception as e:
-            recording.local_storage_status = 'FAILED'
             logger.error(f"Failed to copy to additional local: {e}")
-        
-        db.commit()
+            return 'FAILED'
     
-    def upload_to_nextcloud(self, recording, source_file, db):
-        """Upload recording to NextCloud"""
+    def upload_to_nextcloud(self, recording, source_file, folders, filename):
+        """Upload recording to NextCloud; returns the storage status, or None if not configured"""
         try:
-            nextcloud_url = config.get('storage', 'nextcloud_url')
-            username = config.get('storage', 'nextcloud_username')
-            password = config.get('storage', 'nextcloud_password')
-            
-            if not all([nextcloud_url, username, password]):
+            if not all([self.dav_url, *self.nextcloud_credentials]):
                 return
             
             # Create hierarchical path
-            start_date = recording.start_time
-            base_dir = getattr(recording, 'nextcloud_base_dir', '/Recordings')
-            remote_path = f"{base_dir.strip('/')}/{recording.name}/{start_date.year}/{start_date.strftime('%m-%b')}"
-            filename = f"{recording.name}{start_date.strftime('%y%m%d-%a')}{source_file.suffix}"
+            base_dir = recording.nextcloud_base_dir or '/Recordings'
+            remote_path = '/'.join((base_dir.strip('/'), *folders))
             
             # Create directories first
-            self.create_nextcloud_directories(nextcloud_url, username, password, remote_path)
+            self.create_nextcloud_directories(remote_path)
             
             # Upload using WebDAV
-            upload_url = f"{nextcloud_url.rstrip('/')}/remote.php/dav/files/{username}/{remote_path}/{filename}"
+            upload_url = f"{self.dav_url}/{remote_path}/{filename}"
+            file_size = source_file.stat().st_size
+            
+            # Already uploaded (e.g. the event was redelivered after a restart): skip the transfer
+            existing = _session.head(upload_url, timeout=10)
+            if existing.status_code == 200 and existing.headers.get('Content-Length') == str(file_size):
+                logger.info(f"Already on NextCloud: {remote_path}/{filename}")
+                return 'SUCCESS'
             
-            with open(source_file, 'rb') as f:
-                response = requests.put(
+            if upload_url.startswith('http://'):
+                # No TLS to feed, so the file can go straight from the page cache to the socket
+                status = sendfile_put(upload_url, source_file, self.authorization)
+            else:
+                # Explicit Content-Length keeps requests from falling back to chunked transfer-encoding
+                status = _session.put(
                     upload_url,
-                    data=f,
-                    auth=(username, password),
-                    timeout=300
-                )
+                    data=read_chunks(source_file),
+                    headers={'Content-Length': str(file_size)},
+                    timeout=(10, 300)  # Fail fast on connect, allow slow transfers
+                ).status_code
             
-            if response.status_code in [200, 201, 204]:
-                recording.nextcloud_storage_status = 'SUCCESS'
+            if status in [200, 201, 204]:
                 logger.info(f"Uploaded to NextCloud: {remote_path}/{filename}")
-            else:
-                recording.nextcloud_storage_status = 'FAILED'
-                logger.error(f"NextCloud upload failed: {response.status_code}")
+                return 'SUCCESS'
+            
+            logger.error(f"NextCloud upload failed: {status}")
+            return 'FAILED'
             
         except Exception as e:
-            recording.nextcloud_storage_status = 'FAILED'
             logger.error(f"NextCloud upload failed: {e}")
-        
-        db.commit()
+            return 'FAILED'
     
     def cleanup_old_recordings(self, keep_count, db):
         """Remove old recordings from flat folder only"""
         try:
-            recordings = db.query(Recording).filter(
-                Recording.status.in_(['COMPLETE', 'PARTIAL']),
-                Recording.file_path.isnot(None)
-            ).order_by(Recording.created_at.desc()).all()
+            # Only the rows past keep_count, and only the columns the cleanup needs,
+            # streamed in batches rather than loaded into one list
+            stale = db.execute(
+                select(Recording.id, Recording.file_path).where(
+                    Recording.status.in_(['COMPLETE', 'PARTIAL']),
+                    Recording.file_path.isnot(None)
+                ).order_by(Recording.created_at.desc()).offset(keep_count),
+                execution_options={'yield_per': CLEANUP_FETCH_SIZE}
+            )
             
-            if len(recordings) > keep_count:
-                to_delete = recordings[keep_count:]
-                
-                for recording in to_delete:
-                    file_path = Path(recording.file_path)
-                    if file_path.exists() and file_path.parent.name == 'recordings':  # Only from flat folder
-                        file_path.unlink()
-                        recording.file_path = None
-                        logger.info(f"Deleted old recording: {file_path}")
-                
-                db.commit()
+            deleted_ids = []
+            for recording_id, file_path in stale:
+                if os.path.basename(os.path.dirname(file_path)) != 'recordings':  # Only from flat folder
+                    continue
+                # Held across the unlink, so a recording can't be handed to a worker in between
+                with self.in_flight_lock:
+                    if recording_id in self.in_flight:
+                        continue  # Still being copied or uploaded
+                    # unlink reports a missing file itself, no separate exists() stat needed
+                    try:
+                        os.unlink(file_path)
+                    except FileNotFoundError:
+                        continue
+                deleted_ids.append(recording_id)
+                logger.info(f"Deleted old recording: {file_path}")
             
+            # Nothing past keep_count, or nothing in the flat folder to delete
+            if not deleted_ids:
+                return
+            
+            # The stream holds the connection until exhausted, so the UPDATEs run after it;
+            # clear the paths with one UPDATE per batch instead of one per row
+            for start in range(0, len(deleted_ids), CLEANUP_BATCH_SIZE):
+                db.execute(
+                    update(Recording)
+                    .where(Recording.id.in_(deleted_ids[start:start + CLEANUP_BATCH_SIZE]))
+                    .values(file_path=None),
+                    execution_options={'synchronize_session': False}
+                )
+        
         except Exception as e:
             logger.error(f"Cleanup failed: {e}")
     
@@ -179,8 +329,8 @@ class StorageService:
         try:
             keep_count = message.get('keep_count', 0)
             if keep_count > 0:
-                db = next(get_db())
-                self.cleanup_old_recordings(keep_count, db)
+                with session_scope() as db, self.cleanup_lock:
+                    self.cleanup_old_recordings(keep_count, db)
         except Exception as e:
             logger.error(f"Manual cleanup failed: {e}")
     
@@ -191,26 +341,43 @@ class StorageService:
             event_bus.start_consuming()
         except Exception as e:
             logger.error(f"storage service failed: {e}")
+        finally:
+            _session.close()
     
-    def create_nextcloud_directories(self, nextcloud_url, username, password, full_path):
+    def create_nextcloud_directories(self, full_path):
         """Create NextCloud directories recursively"""
+        if full_path in self.ensured_dirs:
+            return
+        
         try:
-            import requests
+            # One PROPFIND answers for the whole tree when it already exists
+            dir_url = f"{self.dav_url}/{full_path.strip('/')}/"
+            response = _session.request('PROPFIND', dir_url, headers={'Depth': '0'}, timeout=10)
+            if response.status_code == 207:
+                self.ensured_dirs.add(full_path)
+                return
             
-            # Split path into components and create each level
+            # Split path into components and create every level at once
             path_parts = full_path.strip('/').split('/')
-            current_path = ''
+            paths = ['/' + '/'.join(path_parts[:depth]) for depth in range(1, len(path_parts) + 1)]
             
-            for part in path_parts:
-                current_path += f"/{part}"
-                dir_url = f"{nextcloud_url.rstrip('/')}/remote.php/dav/files/{username}{current_path}/"
-                
-                # Try to create directory (MKCOL)
-                response = requests.request('MKCOL', dir_url, auth=(username, password), timeout=30)
+            def mkcol(path):
+                url = f"{self.dav_url}{path}/"
+                return _session.request('MKCOL', url, timeout=30).status_code
+            
+            statuses = list(self.mkcol_pool.map(mkcol, paths))
+            
+            for current_path, status in zip(paths, statuses):
+                # 409 = parent didn't exist yet when this one ran; parents are done by now, so retry in order
+                if status == 409:
+                    status = mkcol(current_path)
                 
                 # 201 = created, 405 = already exists, both are OK
-                if response.status_code not in [201, 405]:
-                    logger.warning(f"Failed to create NextCloud directory {current_path}: HTTP {response.status_code}")
+                if status not in [201, 405]:
+                    logger.warning(f"Failed to create NextCloud directory {current_path}: HTTP {status}")
+                    return
+            
+            self.ensured_dirs.add(full_path)
             
         except Exception as e:
             logger.error(f"Error creating NextCloud directories: {e}")
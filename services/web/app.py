@@ -2,22 +2,42 @@ from flask import Flask, render_template, request, redirect, url_for, session, j
 import sys
 import os
 import json
+import hmac
+import requests
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from pathlib import Path
 from werkzeug.utils import secure_filename
 import uuid
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, contains_eager
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from shared.config import config
 from shared.logging import setup_logger
-from shared.models import get_db, Station, Recording, Podcast, PodcastEpisode, RecordingPart
+from shared.models import get_db, SessionLocal, Station, Recording, Podcast, PodcastEpisode, RecordingPart
 from shared.events import event_bus
+from shared.recurrence import calculate_next_recurrence
 
 app = Flask(__name__)
 app.secret_key = config.get('auth', 'secret_key')
 logger = setup_logger('web')
 
+# Keep-alive connection for NextCloud checks, so repeat validations skip the TCP/TLS handshake
+_nextcloud_session = requests.Session()
+
+# podcast id -> (cache key, {file path: existed}, feed); rebuilt when either part changes
+_rss_cache = {}
+
+# Settings read on every request, looked up once at import
+TIMEZONE = config.get('app', 'timezone', 'Europe/London')
+ADMIN_USERNAME = config.get('auth', 'admin_username')
+ADMIN_PASSWORD = config.get('auth', 'admin_password')
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    """Hand any thread-local session back to the pool when the request ends"""
+    SessionLocal.remove()
+
 # Setup event handlers for podcast episode creation
 def setup_podcast_event_handlers():
     """Setup event handlers for automatic podcast episode creation"""
@@ -33,47 +53,45 @@ def setup_podcast_event_handlers():
                 if status != 'COMPLETE':
                     return  # Only create episodes for successful recordings
                 
-                db = next(get_db())
-                recording = db.query(Recording).filter(Recording.id == recording_id).first()
-                
-                if not recording or not recording.podcast_id:
-                    return  # No podcast assigned
-                
-                # Check if episode already exists
-                existing_episode = db.query(PodcastEpisode).filter(
-                    PodcastEpisode.recording_id == recording_id
-                ).first()
-                
-                if existing_episode:
-                    return  # Episode already exists
-                
-                # Get podcast
-                podcast = db.query(Podcast).filter(Podcast.id == recording.podcast_id).first()
-                if not podcast:
-                    return
-                
-                # Get next episode number
-                last_episode = db.query(PodcastEpisode).filter(
-                    PodcastEpisode.podcast_id == recording.podcast_id
-                ).order_by(PodcastEpisode.episode_number.desc()).first()
-                
-                episode_number = (last_episode.episode_number + 1) if last_episode else 1
-                
-                # Create episode
-                episode = PodcastEpisode(
-                    podcast_id=recording.podcast_id,
-                    recording_id=recording_id,
-                    title=f"{recording.name} - {recording.start_time.strftime('%Y-%m-%d')}",
-                    description=f"Recorded from {recording.station.name} on {recording.start_time.strftime('%B %d, %Y')}",
-                    episode_number=episode_number,
-                    pub_date=recording.start_time
-                )
-                
-                db.add(episode)
-                db.commit()
-                
-                logger.info(f"Created podcast episode {episode_number} for recording {recording.name}")
-                
+                with get_db() as db:
+                    recording = db.query(Recording).options(joinedload(Recording.station)).filter(Recording.id == recording_id).first()
+                    
+                    if not recording or not recording.podcast_id:
+                        return  # No podcast assigned
+                    
+                    # Check if episode already exists (EXISTS, nothing loaded)
+                    existing_episode = db.query(db.query(PodcastEpisode.id).filter(
+                        PodcastEpisode.recording_id == recording_id
+                    ).exists()).scalar()
+                    
+                    if existing_episode:
+                        return  # Episode already exists
+                    
+                    # Get podcast
+                    podcast = db.query(Podcast).filter(Podcast.id == recording.podcast_id).first()
+                    if not podcast:
+                        return
+                    
+                    # Get next episode number without loading the last episode
+                    episode_number = db.query(
+                        func.coalesce(func.max(PodcastEpisode.episode_number), 0)
+                    ).filter(PodcastEpisode.podcast_id == recording.podcast_id).scalar() + 1
+                    
+                    # Create episode
+                    episode = PodcastEpisode(
+                        podcast_id=recording.podcast_id,
+                        recording_id=recording_id,
+                        title=f"{recording.name} - {recording.start_time.strftime('%Y-%m-%d')}",
+                        description=f"Recorded from {recording.station.name} on {recording.start_time.strftime('%B %d, %Y')}",
+                        episode_number=episode_number,
+                        pub_date=recording.start_time
+                    )
+                    
+                    db.add(episode)
+                    db.commit()
+                    
+                    logger.info(f"Created podcast episode {episode_number} for recording {recording.name}")
+                    
             except Exception as e:
                 logger.error(f"Failed to create podcast episode: {e}")
         
@@ -109,11 +127,13 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         
-        # Get credentials from config
-        admin_username = config.get('auth', 'admin_username')
-        admin_password = config.get('auth', 'admin_password')
+        # Constant-time password comparison against the configured credentials
+        password_ok = (
+            ADMIN_PASSWORD is not None and password is not None
+            and hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode())
+        )
         
-        if username == admin_username and password == admin_password:
+        if username == ADMIN_USERNAME and password_ok:
             session['authenticated'] = True
             session['username'] = username
             return redirect(url_for('index'))
@@ -130,7 +150,7 @@ def logout():
 @app.route('/api/timezone')
 def api_timezone():
     return jsonify({
-        'timezone': config.get('app', 'timezone', 'Europe/London')
+        'timezone': TIMEZONE
     })
 
 @app.route('/api/stations')
@@ -138,36 +158,36 @@ def api_stations():
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    stations = db.query(Station).all()
-    return jsonify([{
-        'id': s.id,
-        'name': s.name,
-        'stream_url': s.stream_url,
-        'is_valid': s.is_valid,
-        'format': s.format,
-        'bitrate': s.bitrate,
-        'sample_rate': s.sample_rate,
-        'channels': s.channels,
-        'metadata': s.metadata if isinstance(s.metadata, dict) else None
-    } for s in stations])
+    with get_db() as db:
+        stations = db.query(Station).all()
+        return jsonify([{
+            'id': s.id,
+            'name': s.name,
+            'stream_url': s.stream_url,
+            'is_valid': s.is_valid,
+            'format': s.format,
+            'bitrate': s.bitrate,
+            'sample_rate': s.sample_rate,
+            'channels': s.channels,
+            'metadata': s.metadata if isinstance(s.metadata, dict) else None
+        } for s in stations])
 
 @app.route('/api/recordings')
 def api_recordings():
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    recordings = db.query(Recording).order_by(Recording.created_at.desc()).limit(10).all()
-    return jsonify([{
-        'id': r.id,
-        'name': r.name,
-        'status': r.status,
-        'start_time': r.start_time.isoformat() if r.start_time else None,
-        'duration': r.duration,
-        'is_recurring': r.is_recurring,
-        'recurrence_type': r.recurrence_type
-    } for r in recordings])
+    with get_db() as db:
+        recordings = db.query(Recording).order_by(Recording.created_at.desc()).limit(10).all()
+        return jsonify([{
+            'id': r.id,
+            'name': r.name,
+            'status': r.status,
+            'start_time': r.start_time.isoformat() if r.start_time else None,
+            'duration': r.duration,
+            'is_recurring': r.is_recurring,
+            'recurrence_type': r.recurrence_type
+        } for r in recordings])
 
 # Station Management
 @app.route('/stations')
@@ -208,13 +228,13 @@ def delete_station(station_id):
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    station = db.query(Station).filter(Station.id == station_id).first()
-    if station:
-        db.delete(station)
-        db.commit()
-    
-    return jsonify({'success': True})
+    with get_db() as db:
+        station = db.query(Station).filter(Station.id == station_id).first()
+        if station:
+            db.delete(station)
+            db.commit()
+        
+        return jsonify({'success': True})
 
 # Recording Management
 @app.route('/recordings')
@@ -223,45 +243,15 @@ def recordings():
         return redirect(url_for('login'))
     return render_template('recordings.html')
 
-def calculate_next_recurrence(current_time, recurrence_type):
-    """Calculate next occurrence based on recurrence type"""
-    from dateutil.relativedelta import relativedelta
-    
-    if recurrence_type == 'daily':
-        return current_time + timedelta(days=1)
-    
-    elif recurrence_type == 'weekdays':
-        next_time = current_time + timedelta(days=1)
-        # Skip weekends (Saturday=5, Sunday=6)
-        while next_time.weekday() >= 5:
-            next_time += timedelta(days=1)
-        return next_time
-    
-    elif recurrence_type == 'weekends':
-        next_time = current_time + timedelta(days=1)
-        # Skip weekdays (Monday=0 to Friday=4)
-        while next_time.weekday() < 5:
-            next_time += timedelta(days=1)
-        return next_time
-    
-    elif recurrence_type == 'weekly':
-        return current_time + timedelta(weeks=1)
-    
-    elif recurrence_type == 'monthly':
-        return current_time + relativedelta(months=1)
-    
-    else:
-        raise ValueError(f"Unknown recurrence type: {recurrence_type}")
-
 def schedule_next_recurring_instance(base_recording, db):
     """Schedule only the next instance of a recurring recording"""
-    # Check if next instance already exists
-    existing_next = db.query(Recording).filter(
+    # Check if next instance already exists (EXISTS, nothing loaded)
+    existing_next = db.query(db.query(Recording.id).filter(
         Recording.name == base_recording.name,
         Recording.station_id == base_recording.station_id,
         Recording.is_recurring == False,
         Recording.start_time > base_recording.start_time
-    ).first()
+    ).exists()).scalar()
     
     if existing_next:
         logger.info(f"Next instance already exists for recurring recording: {base_recording.name}")
@@ -298,6 +288,13 @@ def schedule_next_recurring_instance(base_recording, db):
     db.commit()
     
     logger.info(f"Scheduled next recurring instance: {base_recording.name} at {next_time}")
+    
+    # The scheduler only sets start jobs for recordings it is told about
+    event_bus.publish('recording.schedule', {
+        'recording_id': next_recording.id,
+        'start_time': next_recording.start_time.isoformat(),
+        'end_time': next_recording.end_time.isoformat()
+    })
 
 @app.route('/api/recordings', methods=['POST'])
 def create_recording():
@@ -306,64 +303,63 @@ def create_recording():
     
     try:
         data = request.json
-        db = next(get_db())
-        
-        # Default start time is now + 2 minutes
-        start_time = datetime.fromisoformat(data.get('start_time', 
-            (datetime.now() + timedelta(minutes=2)).isoformat()))
-        end_time = start_time + timedelta(minutes=int(data['duration']))
-        
-        # Validate recurrence type matches start day
-        if data.get('is_recurring') and data.get('recurrence_type'):
-            recurrence_type = data['recurrence_type']
-            start_weekday = start_time.weekday()  # 0=Monday, 6=Sunday
-            
-            if recurrence_type == 'weekdays' and start_weekday >= 5:
-                return jsonify({'error': 'Weekdays recordings cannot start on weekends (Sat/Sun)'}), 400
-            elif recurrence_type == 'weekends' and start_weekday < 5:
-                return jsonify({'error': 'Weekend recordings cannot start on weekdays (Mon-Fri)'}), 400
-        
-        # Parse recurrence end date if provided
-        recurrence_end = None
-        if data.get('recurrence_end'):
-            recurrence_end = datetime.fromisoformat(data['recurrence_end'])
-        
-        recording = Recording(
-            name=data['name'],
-            station_id=data['station_id'],
-            podcast_id=data.get('podcast_id') if data.get('podcast_id') else None,
-            start_time=start_time,
-            end_time=end_time,
-            duration=int(data['duration']) * 60,
-            format=data.get('format', 'mp3'),
-            bitrate=data.get('bitrate'),
-            is_recurring=data.get('is_recurring', False),
-            recurrence_type=data.get('recurrence_type'),
-            recurrence_end=recurrence_end,
-            save_to_additional_local=data.get('save_to_additional_local', False),
-            save_to_nextcloud=data.get('save_to_nextcloud', False),
-            nextcloud_base_dir=data.get('nextcloud_base_dir', '/Recordings')
-        )
-        
-        db.add(recording)
-        db.commit()
-        
-        # Generate next recurring instance if needed
-        if recording.is_recurring:
-            schedule_next_recurring_instance(recording, db)
-        
-        # Publish recording schedule event
-        schedule_event = {
-            'recording_id': recording.id,
-            'start_time': start_time.isoformat(),
-            'end_time': end_time.isoformat()
-        }
-        
-        event_bus.publish('recording.schedule', schedule_event)
-        logger.info(f"Published recording.schedule event for: {recording.name} (ID: {recording.id})")
-        
-        return jsonify({'success': True, 'recording_id': recording.id})
-        
+        with get_db() as db:
+            # Default start time is now + 2 minutes
+            start_time = datetime.fromisoformat(data.get('start_time', 
+                (datetime.now() + timedelta(minutes=2)).isoformat()))
+            end_time = start_time + timedelta(minutes=int(data['duration']))
+            
+            # Validate recurrence type matches start day
+            if data.get('is_recurring') and data.get('recurrence_type'):
+                recurrence_type = data['recurrence_type']
+                start_weekday = start_time.weekday()  # 0=Monday, 6=Sunday
+                
+                if recurrence_type == 'weekdays' and start_weekday >= 5:
+                    return jsonify({'error': 'Weekdays recordings cannot start on weekends (Sat/Sun)'}), 400
+                elif recurrence_type == 'weekends' and start_weekday < 5:
+                    return jsonify({'error': 'Weekend recordings cannot start on weekdays (Mon-Fri)'}), 400
+            
+            # Parse recurrence end date if provided
+            recurrence_end = None
+            if data.get('recurrence_end'):
+                recurrence_end = datetime.fromisoformat(data['recurrence_end'])
+            
+            recording = Recording(
+                name=data['name'],
+                station_id=data['station_id'],
+                podcast_id=data.get('podcast_id') if data.get('podcast_id') else None,
+                start_time=start_time,
+                end_time=end_time,
+                duration=int(data['duration']) * 60,
+                format=data.get('format', 'mp3'),
+                bitrate=data.get('bitrate'),
+                is_recurring=data.get('is_recurring', False),
+                recurrence_type=data.get('recurrence_type'),
+                recurrence_end=recurrence_end,
+                save_to_additional_local=data.get('save_to_additional_local', False),
+                save_to_nextcloud=data.get('save_to_nextcloud', False),
+                nextcloud_base_dir=data.get('nextcloud_base_dir', '/Recordings')
+            )
+            
+            db.add(recording)
+            db.commit()
+            
+            # Generate next recurring instance if needed
+            if recording.is_recurring:
+                schedule_next_recurring_instance(recording, db)
+            
+            # Publish recording schedule event
+            schedule_event = {
+                'recording_id': recording.id,
+                'start_time': start_time.isoformat(),
+                'end_time': end_time.isoformat()
+            }
+            
+            event_bus.publish('recording.schedule', schedule_event)
+            logger.info(f"Published recording.schedule event for: {recording.name} (ID: {recording.id})")
+            
+            return jsonify({'success': True, 'recording_id': recording.id})
+            
     except Exception as e:
         logger.error(f"Failed to create recording: {e}")
         return jsonify({'error': str(e)}), 500
@@ -386,19 +382,37 @@ def services():
         return redirect(url_for('login'))
     return render_template('services.html')
 
+def tail_lines(path, count, chunk_size=64 * 1024):
+    """Return the last count lines of a file, reading backwards from the end"""
+    if count <= 0:
+        return []
+    
+    chunks = []
+    newlines = 0
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # One newline more than needed, unless the start of the file comes first
+        while position > 0 and newlines <= count:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size)
+            newlines += chunk.count(b'\n')
+            chunks.append(chunk)
+    
+    data = b''.join(reversed(chunks))
+    return data.decode('utf-8', errors='replace').splitlines()[-count:]
+
 @app.route('/api/logs')
 def api_logs():
     try:
         lines = int(request.args.get('lines', 100))
         log_file = '/home/george/projects/radio1/logs/webradio9.log'
         
-        with open(log_file, 'r') as f:
-            all_lines = f.readlines()
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
+        recent_lines = tail_lines(log_file, lines)
             
         return jsonify({
-            'lines': [line.rstrip() for line in recent_lines],
-            'total_lines': len(all_lines)
+            'lines': [line.rstrip() for line in recent_lines]
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -444,67 +458,67 @@ def get_active_recordings():
     #     return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = next(get_db())
-        
-        # Get all recordings to identify series
-        all_recordings = db.query(Recording).join(Station).all()
-        
-        result = []
-        recurring_series = {}
-        standalone_recordings = []
-        
-        # Identify recurring series by finding recordings with the same name
-        for recording in all_recordings:
-            # Check if there are other recordings with the same name (indicating a series)
-            same_name_recordings = db.query(Recording).filter(Recording.name == recording.name).all()
-            
-            if len(same_name_recordings) > 1:
-                # This is part of a recurring series
-                if recording.name not in recurring_series:
-                    recurring_series[recording.name] = same_name_recordings
-            elif recording.status == 'SCHEDULED':
-                # This is a standalone scheduled recording
-                standalone_recordings.append(recording)
-        
-        # Add recurring series (show next scheduled time)
-        for series_name, recordings_list in recurring_series.items():
-            # Find the template (first recurring recording) and next scheduled
-            template = None
-            next_scheduled = None
-            
-            for rec in recordings_list:
-                if rec.is_recurring and template is None:
-                    template = rec
-                if rec.status == 'SCHEDULED' and (next_scheduled is None or rec.start_time < next_scheduled.start_time):
-                    next_scheduled = rec
-            
-            if template and next_scheduled:
+        with get_db() as db:
+            # Get all recordings with their stations in one query to identify series
+            all_recordings = db.query(Recording).options(joinedload(Recording.station)).all()
+            
+            result = []
+            recurring_series = {}
+            standalone_recordings = []
+            
+            # Group recordings by name in one pass, keeping the order they were loaded in
+            recordings_by_name = {}
+            for recording in all_recordings:
+                recordings_by_name.setdefault(recording.name, []).append(recording)
+            
+            # Identify recurring series by finding recordings with the same name
+            for name, same_name_recordings in recordings_by_name.items():
+                if len(same_name_recordings) > 1:
+                    # This is part of a recurring series
+                    recurring_series[name] = same_name_recordings
+                elif same_name_recordings[0].status == 'SCHEDULED':
+                    # This is a standalone scheduled recording
+                    standalone_recordings.append(same_name_recordings[0])
+            
+            # Add recurring series (show next scheduled time)
+            for series_name, recordings_list in recurring_series.items():
+                # Find the template (first recurring recording) and next scheduled
+                template = None
+                next_scheduled = None
+                
+                for rec in recordings_list:
+                    if rec.is_recurring and template is None:
+                        template = rec
+                    if rec.status == 'SCHEDULED' and (next_scheduled is None or rec.start_time < next_scheduled.start_time):
+                        next_scheduled = rec
+                
+                if template and next_scheduled:
+                    result.append({
+                        'id': template.id,
+                        'name': template.name,
+                        'status': 'SCHEDULED',
+                        'start_time': next_scheduled.start_time.isoformat(),
+                        'duration': template.duration,
+                        'is_recurring': True,
+                        'recurrence_type': template.recurrence_type,
+                        'station_name': template.station.name if template.station else None
+                    })
+            
+            # Add standalone recordings
+            for recording in standalone_recordings:
                 result.append({
-                    'id': template.id,
-                    'name': template.name,
-                    'status': 'SCHEDULED',
-                    'start_time': next_scheduled.start_time.isoformat(),
-                    'duration': template.duration,
-                    'is_recurring': True,
-                    'recurrence_type': template.recurrence_type,
-                    'station_name': template.station.name if template.station else None
+                    'id': recording.id,
+                    'name': recording.name,
+                    'status': recording.status,
+                    'start_time': recording.start_time.isoformat() if recording.start_time else None,
+                    'duration': recording.duration,
+                    'is_recurring': False,
+                    'recurrence_type': None,
+                    'station_name': recording.station.name if recording.station else None
                 })
-        
-        # Add standalone recordings
-        for recording in standalone_recordings:
-            result.append({
-                'id': recording.id,
-                'name': recording.name,
-                'status': recording.status,
-                'start_time': recording.start_time.isoformat() if recording.start_time else None,
-                'duration': recording.duration,
-                'is_recurring': False,
-                'recurrence_type': None,
-                'station_name': recording.station.name if recording.station else None
-            })
-        
-        return jsonify(result)
-        
+            
+            return jsonify(result)
+            
     except Exception as e:
         logger.error(f"Error fetching active recordings: {e}")
         return jsonify({'error': str(e)}), 500
@@ -512,29 +526,29 @@ def get_active_recordings():
 @app.route('/api/recordings/<int:recording_id>', methods=['GET'])
 def get_recording(recording_id):
     try:
-        db = next(get_db())
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        
-        if not recording:
-            return jsonify({'error': 'Recording not found'}), 404
+        with get_db() as db:
+            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            
+            if not recording:
+                return jsonify({'error': 'Recording not found'}), 404
+                
+            return jsonify({
+                'id': recording.id,
+                'name': recording.name,
+                'status': recording.status,
+                'start_time': recording.start_time.isoformat() if recording.start_time else None,
+                'duration': recording.duration,  # This is already in seconds
+                'is_recurring': recording.is_recurring,
+                'recurrence_type': recording.recurrence_type,
+                'recurrence_end': recording.recurrence_end.isoformat() if recording.recurrence_end else None,
+                'station_id': recording.station_id,
+                'format': recording.format,
+                'podcast_id': recording.podcast_id,
+                'save_to_additional_local': recording.save_to_additional_local,
+                'save_to_nextcloud': recording.save_to_nextcloud,
+                'nextcloud_base_dir': recording.nextcloud_base_dir
+            })
             
-        return jsonify({
-            'id': recording.id,
-            'name': recording.name,
-            'status': recording.status,
-            'start_time': recording.start_time.isoformat() if recording.start_time else None,
-            'duration': recording.duration,  # This is already in seconds
-            'is_recurring': recording.is_recurring,
-            'recurrence_type': recording.recurrence_type,
-            'recurrence_end': recording.recurrence_end.isoformat() if recording.recurrence_end else None,
-            'station_id': recording.station_id,
-            'format': recording.format,
-            'podcast_id': recording.podcast_id,
-            'save_to_additional_local': recording.save_to_additional_local,
-            'save_to_nextcloud': recording.save_to_nextcloud,
-            'nextcloud_base_dir': recording.nextcloud_base_dir
-        })
-        
     except Exception as e:
         logger.error(f"Error fetching recording {recording_id}: {e}")
         return jsonify({'error': str(e)}), 500
@@ -546,56 +560,64 @@ def update_recording(recording_id):
     
     try:
         data = request.json
-        db = next(get_db())
-        
-        # Get existing recording
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        if not recording:
-            return jsonify({'error': 'Recording not found'}), 404
-        
-        # Don't allow editing recordings that are currently recording
-        if recording.status == 'RECORDING':
-            return jsonify({'error': 'Cannot edit recording that is currently in progress'}), 400
-        
-        # Parse start time
-        start_time = datetime.fromisoformat(data['start_time'])
-        end_time = start_time + timedelta(minutes=int(data['duration']))
-        
-        # Validate recurrence type matches start day
-        if data.get('is_recurring') and data.get('recurrence_type'):
-            recurrence_type = data['recurrence_type']
-            start_weekday = start_time.weekday()
-            
-            if recurrence_type == 'weekdays' and start_weekday >= 5:
-                return jsonify({'error': 'Weekdays recordings cannot start on weekends (Sat/Sun)'}), 400
-            elif recurrence_type == 'weekends' and start_weekday < 5:
-                return jsonify({'error': 'Weekend recordings cannot start on weekdays (Mon-Fri)'}), 400
-        
-        # Parse recurrence end date if provided
-        recurrence_end = None
-        if data.get('recurrence_end'):
-            recurrence_end = datetime.fromisoformat(data['recurrence_end'])
-        
-        # Update recording fields
-        recording.name = data['name']
-        recording.station_id = data['station_id']
-        recording.podcast_id = data.get('podcast_id') if data.get('podcast_id') else None
-        recording.start_time = start_time
-        recording.end_time = end_time
-        recording.duration = int(data['duration']) * 60
-        recording.format = data.get('format', 'mp3')
-        recording.bitrate = data.get('bitrate')
-        recording.is_recurring = data.get('is_recurring', False)
-        recording.recurrence_type = data.get('recurrence_type')
-        recording.recurrence_end = recurrence_end
-        recording.save_to_additional_local = data.get('save_to_additional_local', False)
-        recording.save_to_nextcloud = data.get('save_to_nextcloud', False)
-        
-        db.commit()
-        
-        logger.info(f"Updated recording: {recording.name} (ID: {recording.id})")
-        return jsonify({'success': True, 'recording_id': recording.id})
-        
+        with get_db() as db:
+            # Get existing recording
+            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            if not recording:
+                return jsonify({'error': 'Recording not found'}), 404
+            
+            # Don't allow editing recordings that are currently recording
+            if recording.status == 'RECORDING':
+                return jsonify({'error': 'Cannot edit recording that is currently in progress'}), 400
+            
+            # Parse start time
+            start_time = datetime.fromisoformat(data['start_time'])
+            end_time = start_time + timedelta(minutes=int(data['duration']))
+            
+            # Validate recurrence type matches start day
+            if data.get('is_recurring') and data.get('recurrence_type'):
+                recurrence_type = data['recurrence_type']
+                start_weekday = start_time.weekday()
+                
+                if recurrence_type == 'weekdays' and start_weekday >= 5:
+                    return jsonify({'error': 'Weekdays recordings cannot start on weekends (Sat/Sun)'}), 400
+                elif recurrence_type == 'weekends' and start_weekday < 5:
+                    return jsonify({'error': 'Weekend recordings cannot start on weekdays (Mon-Fri)'}), 400
+            
+            # Parse recurrence end date if provided
+            recurrence_end = None
+            if data.get('recurrence_end'):
+                recurrence_end = datetime.fromisoformat(data['recurrence_end'])
+            
+            # Update recording fields
+            recording.name = data['name']
+            recording.station_id = data['station_id']
+            recording.podcast_id = data.get('podcast_id') if data.get('podcast_id') else None
+            recording.start_time = start_time
+            recording.end_time = end_time
+            recording.duration = int(data['duration']) * 60
+            recording.format = data.get('format', 'mp3')
+            recording.bitrate = data.get('bitrate')
+            recording.is_recurring = data.get('is_recurring', False)
+            recording.recurrence_type = data.get('recurrence_type')
+            recording.recurrence_end = recurrence_end
+            recording.save_to_additional_local = data.get('save_to_additional_local', False)
+            recording.save_to_nextcloud = data.get('save_to_nextcloud', False)
+            
+            db.commit()
+            
+            logger.info(f"Updated recording: {recording.name} (ID: {recording.id})")
+            
+            # The scheduler replaces the start/stop jobs set for the old times
+            if recording.status == 'SCHEDULED':
+                event_bus.publish('recording.schedule', {
+                    'recording_id': recording.id,
+                    'start_time': start_time.isoformat(),
+                    'end_time': end_time.isoformat()
+                })
+                logger.info(f"Published recording.schedule event for: {recording.name} (ID: {recording.id})")
+            return jsonify({'success': True, 'recording_id': recording.id})
+            
     except Exception as e:
         logger.error(f"Failed to update recording {recording_id}: {e}")
         return jsonify({'error': str(e)}), 500
@@ -642,13 +664,19 @@ def validate_storage():
                 return jsonify({'valid': False, 'error': 'NextCloud credentials not configured'})
             
             # Test NextCloud connection (simplified check)
-            import requests
             try:
-                # Test basic auth to NextCloud
+                # Test basic auth to NextCloud; PROPFIND with Depth 0 describes only the
+                # root itself, where a GET would return the whole directory listing
                 auth_url = f"{nextcloud_url.rstrip('/')}/remote.php/dav/files/{nextcloud_username}/"
-                response = requests.get(auth_url, auth=(nextcloud_username, nextcloud_password), timeout=10)
+                response = _nextcloud_session.request(
+                    'PROPFIND',
+                    auth_url,
+                    auth=(nextcloud_username, nextcloud_password),
+                    headers={'Depth': '0'},
+                    timeout=(5, 10)  # Give up quickly on an unreachable server
+                )
                 
-                if response.status_code == 200:
+                if response.status_code in (200, 207):
                     return jsonify({'valid': True})
                 elif response.status_code == 401:
                     return jsonify({'valid': False, 'error': 'NextCloud authentication failed'})
@@ -675,67 +703,61 @@ def delete_recording(recording_id):
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = next(get_db())
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        
-        if not recording:
-            return jsonify({'error': 'Recording not found'}), 404
-        
-        # Cancel if scheduled
-        if recording.status == 'SCHEDULED':
-            try:
-                event_bus.publish('recording.cancel', {'recording_id': recording_id})
-                logger.info(f"Published recording.cancel event for: {recording.name} (ID: {recording_id})")
-            except Exception as e:
-                logger.warning(f"Failed to publish cancel event: {e}")
-        
-        # Delete related records first (to avoid foreign key constraints)
-        
-        # Delete podcast episodes that reference this recording
-        from shared.models import PodcastEpisode
-        episodes = db.query(PodcastEpisode).filter(PodcastEpisode.recording_id == recording_id).all()
-        for episode in episodes:
-            db.delete(episode)
-        
-        # Delete recording parts
-        from shared.models import RecordingPart
-        parts = db.query(RecordingPart).filter(RecordingPart.recording_id == recording_id).all()
-        for part in parts:
-            db.delete(part)
-        
-        # Delete file if exists
-        if recording.file_path:
-            file_path = Path(recording.file_path)
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted file: {file_path}")
-        
-        # Finally delete the recording
-        recording_name = recording.name
-        db.delete(recording)
-        db.commit()
-        
-        logger.info(f"Deleted recording: {recording_name} (ID: {recording_id})")
-        return jsonify({'success': True})
-        
+        with get_db() as db:
+            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            
+            if not recording:
+                return jsonify({'error': 'Recording not found'}), 404
+            
+            # Cancel if scheduled
+            if recording.status == 'SCHEDULED':
+                try:
+                    event_bus.publish('recording.cancel', {'recording_id': recording_id})
+                    logger.info(f"Published recording.cancel event for: {recording.name} (ID: {recording_id})")
+                except Exception as e:
+                    logger.warning(f"Failed to publish cancel event: {e}")
+            
+            # Delete related records first (to avoid foreign key constraints),
+            # one DELETE per table rather than loading and deleting each row
+            
+            # Delete podcast episodes that reference this recording
+            db.query(PodcastEpisode).filter(PodcastEpisode.recording_id == recording_id).delete(synchronize_session=False)
+            
+            # Delete recording parts
+            db.query(RecordingPart).filter(RecordingPart.recording_id == recording_id).delete(synchronize_session=False)
+            
+            # Delete file if exists
+            if recording.file_path:
+                file_path = Path(recording.file_path)
+                if file_path.exists():
+                    file_path.unlink()
+                    logger.info(f"Deleted file: {file_path}")
+            
+            # Finally delete the recording; a bulk DELETE skips reloading the children removed above
+            recording_name = recording.name
+            db.query(Recording).filter(Recording.id == recording_id).delete(synchronize_session=False)
+            db.commit()
+            
+            logger.info(f"Deleted recording: {recording_name} (ID: {recording_id})")
+            return jsonify({'success': True})
+            
     except Exception as e:
-        db.rollback()
         logger.error(f"Failed to delete recording {recording_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/recordings/<int:recording_id>/download')
 def download_recording(recording_id):
-    db = next(get_db())
-    recording = db.query(Recording).filter(Recording.id == recording_id).first()
-    
-    if not recording or not recording.file_path:
-        return "Recording not found", 404
-    
-    file_path = Path(recording.file_path)
-    if not file_path.exists():
-        return "File not found", 404
-    
-    return send_file(file_path, as_attachment=True)
+    with get_db() as db:
+        recording = db.query(Recording).filter(Recording.id == recording_id).first()
+        
+        if not recording or not recording.file_path:
+            return "Recording not found", 404
+        
+        file_path = Path(recording.file_path)
+        if not file_path.exists():
+            return "File not found", 404
+        
+        return send_file(file_path, as_attachment=True)
 
 # Podcast Management
 @app.route('/podcasts')
@@ -749,21 +771,21 @@ def api_podcasts():
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    podcasts = db.query(Podcast).all()
-    return jsonify([{
-        'id': p.id,
-        'uuid': p.uuid,
-        'title': p.title,
-        'description': p.description,
-        'author': p.author,
-        'email': p.email,
-        'category': p.category,
-        'language': p.language,
-        'image_url': p.image_url,
-        'created_at': p.created_at.isoformat() if p.created_at else None,
-        'episode_count': len(p.episodes)
-    } for p in podcasts])
+    with get_db() as db:
+        podcasts = db.query(Podcast).all()
+        return jsonify([{
+            'id': p.id,
+            'uuid': p.uuid,
+            'title': p.title,
+            'description': p.description,
+            'author': p.author,
+            'email': p.email,
+            'category': p.category,
+            'language': p.language,
+            'image_url': p.image_url,
+            'created_at': p.created_at.isoformat() if p.created_at else None,
+            'episode_count': len(p.episodes)
+        } for p in podcasts])
 
 @app.route('/api/podcasts', methods=['POST'])
 def create_podcast():
@@ -771,56 +793,55 @@ def create_podcast():
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = next(get_db())
-        
-        # Handle form data (with potential file upload)
-        if request.content_type and 'multipart/form-data' in request.content_type:
-            title = request.form.get('title')
-            description = request.form.get('description')
-            author = request.form.get('author')
-            email = request.form.get('email')
-            category = request.form.get('category', 'Technology')
-            
-            # Handle image upload
-            image_url = None
-            if 'image' in request.files:
-                image_file = request.files['image']
-                if image_file and image_file.filename:
-                    # Secure filename and save
-                    filename = secure_filename(image_file.filename)
-                    # Add UUID to prevent conflicts
-                    name, ext = os.path.splitext(filename)
-                    unique_filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
-                    
-                    image_path = Path(__file__).parent / 'static' / 'images' / 'podcasts' / unique_filename
-                    image_file.save(str(image_path))
-                    
-                    # Store relative URL
-                    image_url = f"/static/images/podcasts/{unique_filename}"
-        else:
-            # Handle JSON data (backward compatibility)
-            data = request.json
-            title = data['title']
-            description = data.get('description')
-            author = data.get('author')
-            email = data.get('email')
-            category = data.get('category', 'Technology')
-            image_url = None
-        
-        podcast = Podcast(
-            title=title,
-            description=description,
-            author=author,
-            email=email,
-            category=category,
-            image_url=image_url
-        )
-        
-        db.add(podcast)
-        db.commit()
-        
-        return jsonify({'success': True, 'podcast_id': podcast.id})
-        
+        with get_db() as db:
+            # Handle form data (with potential file upload)
+            if request.content_type and 'multipart/form-data' in request.content_type:
+                title = request.form.get('title')
+                description = request.form.get('description')
+                author = request.form.get('author')
+                email = request.form.get('email')
+                category = request.form.get('category', 'Technology')
+                
+                # Handle image upload
+                image_url = None
+                if 'image' in request.files:
+                    image_file = request.files['image']
+                    if image_file and image_file.filename:
+                        # Secure filename and save
+                        filename = secure_filename(image_file.filename)
+                        # Add UUID to prevent conflicts
+                        name, ext = os.path.splitext(filename)
+                        unique_filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+                        
+                        image_path = Path(__file__).parent / 'static' / 'images' / 'podcasts' / unique_filename
+                        image_file.save(str(image_path))
+                        
+                        # Store relative URL
+                        image_url = f"/static/images/podcasts/{unique_filename}"
+            else:
+                # Handle JSON data (backward compatibility)
+                data = request.json
+                title = data['title']
+                description = data.get('description')
+                author = data.get('author')
+                email = data.get('email')
+                category = data.get('category', 'Technology')
+                image_url = None
+            
+            podcast = Podcast(
+                title=title,
+                description=description,
+                author=author,
+                email=email,
+                category=category,
+                image_url=image_url
+            )
+            
+            db.add(podcast)
+            db.commit()
+            
+            return jsonify({'success': True, 'podcast_id': podcast.id})
+            
     except Exception as e:
         logger.error(f"Failed to create podcast: {e}")
         return jsonify({'error': str(e)}), 500
@@ -831,68 +852,67 @@ def update_podcast(podcast_id):
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = next(get_db())
-        
-        # Get existing podcast
-        podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
-        if not podcast:
-            return jsonify({'error': 'Podcast not found'}), 404
-        
-        # Handle both form data and JSON
-        if request.content_type and 'multipart/form-data' in request.content_type:
-            # Form data with potential file upload
-            title = request.form.get('title')
-            description = request.form.get('description', '')
-            author = request.form.get('author', '')
-            email = request.form.get('email', '')
-            category = request.form.get('category', 'Technology')
-            
-            # Handle image upload
-            image_url = podcast.image_url  # Keep existing image by default
-            image_file = request.files.get('image')
-            if image_file and image_file.filename:
-                # Save new image
-                filename = secure_filename(image_file.filename)
-                name, ext = os.path.splitext(filename)
-                unique_filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
-                
-                image_path = Path(__file__).parent / 'static' / 'images' / 'podcasts' / unique_filename
-                image_file.save(str(image_path))
-                
-                # Delete old image if exists
-                if podcast.image_url:
-                    try:
-                        old_image_path = Path(__file__).parent / 'static' / podcast.image_url.lstrip('/')
-                        if old_image_path.exists():
-                            old_image_path.unlink()
-                    except Exception as e:
-                        logger.warning(f"Failed to delete old podcast image: {e}")
+        with get_db() as db:
+            # Get existing podcast
+            podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
+            if not podcast:
+                return jsonify({'error': 'Podcast not found'}), 404
+            
+            # Handle both form data and JSON
+            if request.content_type and 'multipart/form-data' in request.content_type:
+                # Form data with potential file upload
+                title = request.form.get('title')
+                description = request.form.get('description', '')
+                author = request.form.get('author', '')
+                email = request.form.get('email', '')
+                category = request.form.get('category', 'Technology')
                 
-                image_url = f"/static/images/podcasts/{unique_filename}"
-        else:
-            # JSON data
-            data = request.json
-            title = data.get('title')
-            description = data.get('description', '')
-            author = data.get('author', '')
-            email = data.get('email', '')
-            category = data.get('category', 'Technology')
-            image_url = podcast.image_url  # Keep existing image
-        
-        # Update podcast fields
-        podcast.title = title
-        podcast.description = description
-        podcast.author = author
-        podcast.email = email
-        podcast.category = category
-        if image_url:
-            podcast.image_url = image_url
-        
-        db.commit()
-        
-        logger.info(f"Updated podcast: {podcast.title} (ID: {podcast_id})")
-        return jsonify({'success': True, 'podcast_id': podcast.id})
-        
+                # Handle image upload
+                image_url = podcast.image_url  # Keep existing image by default
+                image_file = request.files.get('image')
+                if image_file and image_file.filename:
+                    # Save new image
+                    filename = secure_filename(image_file.filename)
+                    name, ext = os.path.splitext(filename)
+                    unique_filename = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+                    
+                    image_path = Path(__file__).parent / 'static' / 'images' / 'podcasts' / unique_filename
+                    image_file.save(str(image_path))
+                    
+                    # Delete old image if exists
+                    if podcast.image_url:
+                        try:
+                            old_image_path = Path(__file__).parent / 'static' / podcast.image_url.lstrip('/')
+                            if old_image_path.exists():
+                                old_image_path.unlink()
+                        except Exception as e:
+                            logger.warning(f"Failed to delete old podcast image: {e}")
+                    
+                    image_url = f"/static/images/podcasts/{unique_filename}"
+            else:
+                # JSON data
+                data = request.json
+                title = data.get('title')
+                description = data.get('description', '')
+                author = data.get('author', '')
+                email = data.get('email', '')
+                category = data.get('category', 'Technology')
+                image_url = podcast.image_url  # Keep existing image
+            
+            # Update podcast fields
+            podcast.title = title
+            podcast.description = description
+            podcast.author = author
+            podcast.email = email
+            podcast.category = category
+            if image_url:
+                podcast.image_url = image_url
+            
+            db.commit()
+            
+            logger.info(f"Updated podcast: {podcast.title} (ID: {podcast_id})")
+            return jsonify({'success': True, 'podcast_id': podcast.id})
+            
     except Exception as e:
         logger.error(f"Failed to update podcast {podcast_id}: {e}")
         return jsonify({'error': str(e)}), 500
@@ -905,33 +925,33 @@ def delete_podcast(podcast_id):
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        db = next(get_db())
-        podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
-        
-        if not podcast:
-            return jsonify({'error': 'Podcast not found'}), 404
-        
-        # Delete associated episodes first
-        episodes = db.query(PodcastEpisode).filter(PodcastEpisode.podcast_id == podcast_id).all()
-        for episode in episodes:
-            db.delete(episode)
-        
-        # Delete podcast image if exists
-        if podcast.image_url:
-            try:
-                image_path = Path(__file__).parent / 'static' / podcast.image_url.lstrip('/')
-                if image_path.exists():
-                    image_path.unlink()
-            except Exception as e:
-                logger.warning(f"Failed to delete podcast image: {e}")
-        
-        # Delete podcast
-        db.delete(podcast)
-        db.commit()
-        
-        logger.info(f"Deleted podcast: {podcast.title} (ID: {podcast_id})")
-        return jsonify({'success': True})
-        
+        with get_db() as db:
+            podcast = db.query(Podcast).filter(Podcast.id == podcast_id).first()
+            
+            if not podcast:
+                return jsonify({'error': 'Podcast not found'}), 404
+            
+            # Delete associated episodes first
+            episodes = db.query(PodcastEpisode).filter(PodcastEpisode.podcast_id == podcast_id).all()
+            for episode in episodes:
+                db.delete(episode)
+            
+            # Delete podcast image if exists
+            if podcast.image_url:
+                try:
+                    image_path = Path(__file__).parent / 'static' / podcast.image_url.lstrip('/')
+                    if image_path.exists():
+                        image_path.unlink()
+                except Exception as e:
+                    logger.warning(f"Failed to delete podcast image: {e}")
+            
+            # Delete podcast
+            db.delete(podcast)
+            db.commit()
+            
+            logger.info(f"Deleted podcast: {podcast.title} (ID: {podcast_id})")
+            return jsonify({'success': True})
+            
     except Exception as e:
         logger.error(f"Failed to delete podcast {podcast_id}: {e}")
         return jsonify({'error': str(e)}), 500
@@ -941,27 +961,27 @@ def delete_podcast(podcast_id):
 def podcasts_public_list():
     """Public list of all podcasts - no authentication required"""
     try:
-        db = next(get_db())
-        podcasts = db.query(Podcast).all()
-        
-        # Only show podcasts that have episodes
-        podcasts_with_episodes = []
-        for podcast in podcasts:
-            episode_count = db.query(PodcastEpisode).filter(
-                PodcastEpisode.podcast_id == podcast.id
-            ).join(Recording).filter(
-                Recording.file_path.isnot(None),
-                Recording.status == 'COMPLETE'
-            ).count()
+        with get_db() as db:
+            podcasts = db.query(Podcast).all()
+            
+            # Only show podcasts that have episodes
+            podcasts_with_episodes = []
+            for podcast in podcasts:
+                episode_count = db.query(PodcastEpisode).filter(
+                    PodcastEpisode.podcast_id == podcast.id
+                ).join(Recording).filter(
+                    Recording.file_path.isnot(None),
+                    Recording.status == 'COMPLETE'
+                ).count()
+                
+                if episode_count > 0:
+                    podcasts_with_episodes.append({
+                        'podcast': podcast,
+                        'episode_count': episode_count
+                    })
+            
+            return render_template('podcasts_public_list.html', podcasts=podcasts_with_episodes)
             
-            if episode_count > 0:
-                podcasts_with_episodes.append({
-                    'podcast': podcast,
-                    'episode_count': episode_count
-                })
-        
-        return render_template('podcasts_public_list.html', podcasts=podcasts_with_episodes)
-        
     except Exception as e:
         logger.error(f"Public podcasts list failed: {e}")
         return "Error loading podcasts", 500
@@ -970,28 +990,52 @@ def podcasts_public_list():
 def podcast_rss(podcast_uuid):
     """Generate RSS feed for podcast - public access"""
     try:
-        db = next(get_db())
-        podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
-        
-        if not podcast:
-            return "Podcast not found", 404
-        
-        # Get episodes with valid recordings
-        episodes = db.query(PodcastEpisode).filter(
-            PodcastEpisode.podcast_id == podcast.id
-        ).join(Recording).filter(
-            Recording.file_path.isnot(None),
-            Recording.status == 'COMPLETE'
-        ).order_by(PodcastEpisode.pub_date.desc()).all()
-        
-        # Get base URL from request
-        base_url = f"{request.scheme}://{request.host}"
-        
-        # Generate RSS content
-        rss_content = generate_podcast_rss(podcast, episodes, base_url)
-        
-        return Response(rss_content, mimetype='application/rss+xml')
-        
+        with get_db() as db:
+            podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
+            
+            if not podcast:
+                return "Podcast not found", 404
+            
+            # Get base URL from request
+            base_url = f"{request.scheme}://{request.host}"
+            
+            # One aggregate over the feed's episodes: any added, edited or deleted episode, or a
+            # recording whose file_path was cleared or row updated, changes it
+            episode_state = db.query(
+                func.count(PodcastEpisode.id),
+                func.max(PodcastEpisode.updated_at),
+                func.max(Recording.updated_at)
+            ).join(Recording, PodcastEpisode.recording).filter(
+                PodcastEpisode.podcast_id == podcast.id,
+                Recording.file_path.isnot(None),
+                Recording.status == 'COMPLETE'
+            ).one()
+            cache_key = (base_url, podcast.updated_at, *episode_state)
+            
+            # Files vanishing from (or returning to) disk don't touch the database, so recheck them
+            cached = _rss_cache.get(podcast.id)
+            if cached and cached[0] == cache_key and all(
+                os.path.exists(path) == existed for path, existed in cached[1].items()
+            ):
+                return Response(cached[2], mimetype='application/rss+xml')
+            
+            # Get episodes with valid recordings
+            episodes = db.query(PodcastEpisode).filter(
+                PodcastEpisode.podcast_id == podcast.id
+            ).join(Recording).filter(
+                Recording.file_path.isnot(None),
+                Recording.status == 'COMPLETE'
+            ).options(contains_eager(PodcastEpisode.recording)).order_by(PodcastEpisode.pub_date.desc()).all()
+            
+            files = {episode.recording.file_path: os.path.exists(episode.recording.file_path) for episode in episodes}
+            
+            # Generate RSS content
+            rss_content = generate_podcast_rss(podcast, episodes, base_url)
+            if rss_content is not None:
+                _rss_cache[podcast.id] = (cache_key, files, rss_content)
+            
+            return Response(rss_content, mimetype='application/rss+xml')
+            
     except Exception as e:
         logger.error(f"RSS generation failed for podcast {podcast_uuid}: {e}")
         return "RSS generation failed", 500
@@ -1000,28 +1044,28 @@ def podcast_rss(podcast_uuid):
 def podcast_public(podcast_uuid):
     """Public podcast page - no authentication required"""
     try:
-        db = next(get_db())
-        podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
-        
-        if not podcast:
-            return "Podcast not found", 404
-        
-        # Get episodes with valid recordings
-        episodes = db.query(PodcastEpisode).filter(
-            PodcastEpisode.podcast_id == podcast.id
-        ).join(Recording).filter(
-            Recording.file_path.isnot(None),
-            Recording.status == 'COMPLETE'
-        ).order_by(PodcastEpisode.pub_date.desc()).all()
-        
-        # Check if files exist on disk
-        valid_episodes = []
-        for episode in episodes:
-            if episode.recording.file_path and os.path.exists(episode.recording.file_path):
-                valid_episodes.append(episode)
-        
-        return render_template('podcast_public.html', podcast=podcast, episodes=valid_episodes)
-        
+        with get_db() as db:
+            podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
+            
+            if not podcast:
+                return "Podcast not found", 404
+            
+            # Get episodes with valid recordings
+            episodes = db.query(PodcastEpisode).filter(
+                PodcastEpisode.podcast_id == podcast.id
+            ).join(Recording).filter(
+                Recording.file_path.isnot(None),
+                Recording.status == 'COMPLETE'
+            ).options(contains_eager(PodcastEpisode.recording)).order_by(PodcastEpisode.pub_date.desc()).all()
+            
+            # Check if files exist on disk
+            valid_episodes = []
+            for episode in episodes:
+                if episode.recording.file_path and os.path.exists(episode.recording.file_path):
+                    valid_episodes.append(episode)
+            
+            return render_template('podcast_public.html', podcast=podcast, episodes=valid_episodes)
+            
     except Exception as e:
         logger.error(f"Public podcast page failed for {podcast_uuid}: {e}")
         return "Podcast not found", 404
@@ -1030,28 +1074,27 @@ def podcast_public(podcast_uuid):
 def podcast_episode_download(podcast_uuid, episode_id):
     """Download podcast episode - public access"""
     try:
-        db = next(get_db())
-        
-        # Verify podcast and episode exist
-        podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
-        if not podcast:
-            return "Podcast not found", 404
-            
-        episode = db.query(PodcastEpisode).filter(
-            PodcastEpisode.id == episode_id,
-            PodcastEpisode.podcast_id == podcast.id
-        ).first()
-        
-        if not episode or not episode.recording:
-            return "Episode not found", 404
-        
-        recording = episode.recording
-        if not recording.file_path or not os.path.exists(recording.file_path):
-            return "File not found", 404
-        
-        filename = f"{episode.title}.{recording.format or 'mp3'}"
-        return send_file(recording.file_path, as_attachment=True, download_name=filename)
-        
+        with get_db() as db:
+            # Verify podcast and episode exist
+            podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
+            if not podcast:
+                return "Podcast not found", 404
+                
+            episode = db.query(PodcastEpisode).filter(
+                PodcastEpisode.id == episode_id,
+                PodcastEpisode.podcast_id == podcast.id
+            ).first()
+            
+            if not episode or not episode.recording:
+                return "Episode not found", 404
+            
+            recording = episode.recording
+            if not recording.file_path or not os.path.exists(recording.file_path):
+                return "File not found", 404
+            
+            filename = f"{episode.title}.{recording.format or 'mp3'}"
+            return send_file(recording.file_path, as_attachment=True, download_name=filename)
+            
     except Exception as e:
         logger.error(f"Episode download failed: {e}")
         return "Download failed", 500
@@ -1060,37 +1103,36 @@ def podcast_episode_download(podcast_uuid, episode_id):
 def podcast_episode_stream(podcast_uuid, episode_id):
     """Stream podcast episode - public access"""
     try:
-        db = next(get_db())
-        
-        # Verify podcast and episode exist
-        podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
-        if not podcast:
-            return "Podcast not found", 404
-            
-        episode = db.query(PodcastEpisode).filter(
-            PodcastEpisode.id == episode_id,
-            PodcastEpisode.podcast_id == podcast.id
-        ).first()
-        
-        if not episode or not episode.recording:
-            return "Episode not found", 404
-        
-        recording = episode.recording
-        if not recording.file_path or not os.path.exists(recording.file_path):
-            return "File not found", 404
-        
-        # Determine MIME type
-        if recording.file_path.endswith('.mp3'):
-            mimetype = 'audio/mpeg'
-        elif recording.file_path.endswith('.aac'):
-            mimetype = 'audio/aac'
-        elif recording.file_path.endswith('.m4a'):
-            mimetype = 'audio/mp4'
-        else:
-            mimetype = 'audio/mpeg'
-        
-        return send_file(recording.file_path, mimetype=mimetype)
-        
+        with get_db() as db:
+            # Verify podcast and episode exist
+            podcast = db.query(Podcast).filter(Podcast.uuid == podcast_uuid).first()
+            if not podcast:
+                return "Podcast not found", 404
+                
+            episode = db.query(PodcastEpisode).filter(
+                PodcastEpisode.id == episode_id,
+                PodcastEpisode.podcast_id == podcast.id
+            ).first()
+            
+            if not episode or not episode.recording:
+                return "Episode not found", 404
+            
+            recording = episode.recording
+            if not recording.file_path or not os.path.exists(recording.file_path):
+                return "File not found", 404
+            
+            # Determine MIME type
+            if recording.file_path.endswith('.mp3'):
+                mimetype = 'audio/mpeg'
+            elif recording.file_path.endswith('.aac'):
+                mimetype = 'audio/aac'
+            elif recording.file_path.endswith('.m4a'):
+                mimetype = 'audio/mp4'
+            else:
+                mimetype = 'audio/mpeg'
+            
+            return send_file(recording.file_path, mimetype=mimetype)
+            
     except Exception as e:
         logger.error(f"Episode streaming failed: {e}")
         return "Streaming failed", 500
@@ -1170,22 +1212,22 @@ def escape_xml(text):
 @app.route('/api/recordings/history')
 def api_recordings_history():
     try:
-        db = next(get_db())
-        recordings = db.query(Recording).filter(Recording.status.in_(['COMPLETE', 'FAILED', 'CANCELLED', 'PARTIAL'])).all()
-        
-        result = []
-        for recording in recordings:
-            result.append({
-                'id': recording.id,
-                'name': recording.name,
-                'start_time': recording.start_time.isoformat() if recording.start_time else None,
-                'status': recording.status.lower() if recording.status else 'unknown',
-                'format': recording.format,
-                'file_size': recording.file_size,
-                'file_path': recording.file_path
-            })
-        
-        return jsonify(result)
+        with get_db() as db:
+            recordings = db.query(Recording).filter(Recording.status.in_(['COMPLETE', 'FAILED', 'CANCELLED', 'PARTIAL'])).all()
+            
+            result = []
+            for recording in recordings:
+                result.append({
+                    'id': recording.id,
+                    'name': recording.name,
+                    'start_time': recording.start_time.isoformat() if recording.start_time else None,
+                    'status': recording.status.lower() if recording.status else 'unknown',
+                    'format': recording.format,
+                    'file_size': recording.file_size,
+                    'file_path': recording.file_path
+                })
+            
+            return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1196,29 +1238,29 @@ def bulk_download():
         if not recording_ids:
             return jsonify({'error': 'No recordings selected'}), 400
         
-        db = next(get_db())
-        recordings = db.query(Recording).filter(Recording.id.in_(recording_ids), Recording.status == 'COMPLETE').all()
-        
-        if len(recordings) == 1:
-            # Single file download
-            recording = recordings[0]
-            if recording.file_path and os.path.exists(recording.file_path):
-                return send_file(recording.file_path, as_attachment=True)
-        else:
-            # Multiple files - create zip
-            import zipfile
-            import tempfile
-            
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            with zipfile.ZipFile(temp_zip.name, 'w') as zip_file:
-                for recording in recordings:
-                    if recording.file_path and os.path.exists(recording.file_path):
-                        filename = f"{recording.name}.{recording.format or 'mp3'}"
-                        zip_file.write(recording.file_path, filename)
-            
-            return send_file(temp_zip.name, as_attachment=True, download_name='recordings.zip')
-        
-        return jsonify({'error': 'No valid files found'}), 404
+        with get_db() as db:
+            recordings = db.query(Recording).filter(Recording.id.in_(recording_ids), Recording.status == 'COMPLETE').all()
+            
+            if len(recordings) == 1:
+                # Single file download
+                recording = recordings[0]
+                if recording.file_path and os.path.exists(recording.file_path):
+                    return send_file(recording.file_path, as_attachment=True)
+            else:
+                # Multiple files - create zip
+                import zipfile
+                import tempfile
+                
+                temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+                with zipfile.ZipFile(temp_zip.name, 'w') as zip_file:
+                    for recording in recordings:
+                        if recording.file_path and os.path.exists(recording.file_path):
+                            filename = f"{recording.name}.{recording.format or 'mp3'}"
+                            zip_file.write(recording.file_path, filename)
+                
+                return send_file(temp_zip.name, as_attachment=True, download_name='recordings.zip')
+            
+            return jsonify({'error': 'No valid files found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1231,73 +1273,67 @@ def bulk_delete():
         if not recording_ids:
             return jsonify({'error': 'No recordings selected'}), 400
         
-        db = next(get_db())
-        recordings = db.query(Recording).filter(Recording.id.in_(recording_ids)).all()
-        
-        for recording in recordings:
-            # Delete podcast episodes that reference this recording
-            episodes = db.query(PodcastEpisode).filter(PodcastEpisode.recording_id == recording.id).all()
-            for episode in episodes:
-                db.delete(episode)
+        with get_db() as db:
+            recordings = db.query(Recording).filter(Recording.id.in_(recording_ids)).all()
+            found_ids = [recording.id for recording in recordings]
             
-            # Delete recording parts
-            parts = db.query(RecordingPart).filter(RecordingPart.recording_id == recording.id).all()
-            for part in parts:
-                db.delete(part)
+            # Delete podcast episodes and recording parts for every selected recording at once
+            db.query(PodcastEpisode).filter(PodcastEpisode.recording_id.in_(found_ids)).delete(synchronize_session=False)
+            db.query(RecordingPart).filter(RecordingPart.recording_id.in_(found_ids)).delete(synchronize_session=False)
             
-            # Delete file if it exists
-            if recording.file_path and os.path.exists(recording.file_path):
-                os.remove(recording.file_path)
+            for recording in recordings:
+                # Delete file if it exists
+                if recording.file_path and os.path.exists(recording.file_path):
+                    os.remove(recording.file_path)
             
-            # Delete recording
-            db.delete(recording)
-        
-        db.commit()
-        return jsonify({'success': True, 'deleted': len(recordings)})
+            # Delete recordings
+            db.query(Recording).filter(Recording.id.in_(found_ids)).delete(synchronize_session=False)
+            
+            db.commit()
+            return jsonify({'success': True, 'deleted': len(recordings)})
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/recordings/<int:recording_id>/download')
 def api_download_recording(recording_id):
     try:
-        db = next(get_db())
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        
-        if not recording:
-            return jsonify({'error': 'Recording not found'}), 404
-        
-        if not recording.file_path or not os.path.exists(recording.file_path):
-            return jsonify({'error': 'File not found'}), 404
-        
-        filename = f"{recording.name}.{recording.format or 'mp3'}"
-        return send_file(recording.file_path, as_attachment=True, download_name=filename)
+        with get_db() as db:
+            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            
+            if not recording:
+                return jsonify({'error': 'Recording not found'}), 404
+            
+            if not recording.file_path or not os.path.exists(recording.file_path):
+                return jsonify({'error': 'File not found'}), 404
+            
+            filename = f"{recording.name}.{recording.format or 'mp3'}"
+            return send_file(recording.file_path, as_attachment=True, download_name=filename)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/recordings/<int:recording_id>/stream')
 def stream_recording_by_id(recording_id):
     try:
-        db = next(get_db())
-        recording = db.query(Recording).filter(Recording.id == recording_id).first()
-        
-        if not recording or not recording.file_path:
-            return jsonify({'error': 'Recording or file not found'}), 404
-        
-        if not os.path.exists(recording.file_path):
-            return jsonify({'error': 'File not found on disk'}), 404
-        
-        # Determine MIME type based on file extension
-        if recording.file_path.endswith('.mp3'):
-            mimetype = 'audio/mpeg'
-        elif recording.file_path.endswith('.aac'):
-            mimetype = 'audio/aac'
-        elif recording.file_path.endswith('.m4a'):
-            mimetype = 'audio/mp4'
-        else:
-            mimetype = 'audio/mpeg'
-        
-        return send_file(recording.file_path, mimetype=mimetype)
+        with get_db() as db:
+            recording = db.query(Recording).filter(Recording.id == recording_id).first()
+            
+            if not recording or not recording.file_path:
+                return jsonify({'error': 'Recording or file not found'}), 404
+            
+            if not os.path.exists(recording.file_path):
+                return jsonify({'error': 'File not found on disk'}), 404
+            
+            # Determine MIME type based on file extension
+            if recording.file_path.endswith('.mp3'):
+                mimetype = 'audio/mpeg'
+            elif recording.file_path.endswith('.aac'):
+                mimetype = 'audio/aac'
+            elif recording.file_path.endswith('.m4a'):
+                mimetype = 'audio/mp4'
+            else:
+                mimetype = 'audio/mpeg'
+            
+            return send_file(recording.file_path, mimetype=mimetype)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1330,7 +1366,6 @@ def system_health():
                 
                 if service['health_port'] and process_running:
                     try:
-                        import requests
                         response = requests.get(f"http://localhost:{service['health_port']}/health", timeout=2)
                         if response.status_code == 200:
                             health_data = response.json()
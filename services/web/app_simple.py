@@ -50,32 +50,32 @@ def api_stations():
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    stations = db.query(Station).all()
-    return jsonify([{
-        'id': s.id,
-        'name': s.name,
-        'stream_url': s.stream_url,
-        'is_valid': s.is_valid,
-        'format': s.format,
-        'bitrate': s.bitrate
-    } for s in stations])
+    with get_db() as db:
+        stations = db.query(Station).all()
+        return jsonify([{
+            'id': s.id,
+            'name': s.name,
+            'stream_url': s.stream_url,
+            'is_valid': s.is_valid,
+            'format': s.format,
+            'bitrate': s.bitrate
+        } for s in stations])
 
 @app.route('/api/recordings')
 def api_recordings():
     if 'authenticated' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    db = next(get_db())
-    recordings = db.query(Recording).order_by(Recording.created_at.desc()).all()
-    return jsonify([{
-        'id': r.id,
-        'name': r.name,
-        'status': r.status,
-        'start_time': r.start_time.isoformat() if r.start_time else None,
-        'duration': r.duration,
-        'file_size': r.file_size
-    } for r in recordings])
+    with get_db() as db:
+        recordings = db.query(Recording).order_by(Recording.created_at.desc()).all()
+        return jsonify([{
+            'id': r.id,
+            'name': r.name,
+            'status': r.status,
+            'start_time': r.start_time.isoformat() if r.start_time else None,
+            'duration': r.duration,
+            'file_size': r.file_size
+        } for r in recordings])
 
 @app.route('/stations')
 def stations():
@@ -91,17 +91,17 @@ def recordings():
 
 @app.route('/recordings/<int:recording_id>/download')
 def download_recording(recording_id):
-    db = next(get_db())
-    recording = db.query(Recording).filter(Recording.id == recording_id).first()
-    
-    if not recording or not recording.file_path:
-        return "Recording not found", 404
-    
-    file_path = Path(recording.file_path)
-    if not file_path.exists():
-        return "File not found", 404
-    
-    return send_file(file_path, as_attachment=True)
+    with get_db() as db:
+        recording = db.query(Recording).filter(Recording.id == recording_id).first()
+        
+        if not recording or not recording.file_path:
+            return "Recording not found", 404
+        
+        file_path = Path(recording.file_path)
+        if not file_path.exists():
+            return "File not found", 404
+        
+        return send_file(file_path, as_attachment=True)
 
 if __name__ == '__main__':
     logger.info("Starting simplified web service...")
@@ -6,6 +6,9 @@ class EventBus:
     def __init__(self):
         self.connection = None
         self.channel = None
+        # Publisher confirms make every publish wait on the connection for the broker's ack;
+        # only safe for a service whose publishes all run on the consumer thread
+        self.confirm_publishes = False
         # Don't connect automatically - connect when needed
     
     def connect(self):
@@ -24,10 +27,28 @@ class EventBus:
         )
         self.connection = pika.BlockingConnection(parameters)
         self.channel = self.connection.channel()
+        if self.confirm_publishes:
+            # Publishes wait for the broker's ack, so a lost message raises instead of vanishing
+            self.channel.confirm_delivery()
         
         # Declare exchange
         self.channel.exchange_declare(exchange='webradio9', exchange_type='topic')
     
+    def reopen_channel(self):
+        """Replace a channel the broker closed, keeping the connection"""
+        self.channel = self.connection.channel()
+        if self.confirm_publishes:
+            self.channel.confirm_delivery()
+    
+    def disconnect(self):
+        """Drop the current connection so the next connect() opens a new one"""
+        try:
+            if self.connection and self.connection.is_open:
+                self.connection.close()
+        except pika.exceptions.AMQPError:
+            pass
+        self.connection = None
+    
     def publish(self, routing_key, message):
         self.connect()  # Ensure connection before publishing
         self.channel.basic_publish(
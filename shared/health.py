@@ -0,0 +1,62 @@
+import json
+import asyncio
+import hashlib
+import threading
+
+class HealthServer:
+    """Serve GET /health from an asyncio loop on one daemon thread, using a payload encoded once per state change"""
+
+    def __init__(self, port, status):
+        self.set_status(status)
+        self.port = port
+
+        health_thread = threading.Thread(target=asyncio.run, args=(self.serve(),), daemon=True)
+        health_thread.start()
+
+    def set_status(self, status):
+        """Encode a new status dict; probes pick it up with a single attribute read"""
+        body = json.dumps(status).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.response = (
+            etag,
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: application/json\r\n'
+            b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+            b'ETag: ' + etag.encode() + b'\r\n'
+            b'Connection: close\r\n\r\n' + body,
+            # Repeated probes sending If-None-Match get a bodiless 304
+            b'HTTP/1.1 304 Not Modified\r\n'
+            b'ETag: ' + etag.encode() + b'\r\n'
+            b'Connection: close\r\n\r\n'
+        )
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, '0.0.0.0', self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if_none_match = None
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'if-none-match':
+                    if_none_match = value.strip()
+
+            parts = request_line.split()
+            etag, ok, not_modified = self.response
+            if len(parts) < 2 or parts[0] != b'GET' or parts[1].split(b'?', 1)[0] != b'/health':
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            elif if_none_match == etag:
+                writer.write(not_modified)
+            else:
+                writer.write(ok)
+            await writer.drain()
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, scoped_session, relationship
 from datetime import datetime
+from contextlib import contextmanager
 import uuid
 from .config import config
 
@@ -53,6 +54,16 @@ class Recording(Base):
     station = relationship("Station", back_populates="recordings")
     parts = relationship("RecordingPart", back_populates="recording")
     podcast_episodes = relationship("PodcastEpisode", back_populates="recording")
+    
+    __table_args__ = (
+        # Series lookups: latest instance and next-instance existence per (name, station)
+        Index('ix_rec_series', 'name', 'station_id', 'is_recurring', 'start_time'),
+        # Scheduler start-up scans; MySQL has no partial indexes, so status leads instead
+        Index('ix_rec_status_start', 'status', 'start_time'),
+        Index('ix_rec_status_end', 'status', 'end_time'),
+        # Storage cleanup: newest finished recordings first
+        Index('ix_rec_status_created', 'status', created_at.desc()),
+    )
 
 class Podcast(Base):
     __tablename__ = 'podcasts'
@@ -87,6 +98,11 @@ class PodcastEpisode(Base):
     
     podcast = relationship("Podcast", back_populates="episodes")
     recording = relationship("Recording", back_populates="podcast_episodes")
+    
+    __table_args__ = (
+        # Next episode number per podcast; also serves the podcast_id foreign key
+        Index('ix_podcastep_podcast_epnum', 'podcast_id', 'episode_number'),
+    )
 
 class RecordingPart(Base):
     __tablename__ = 'recording_parts'
@@ -107,19 +123,38 @@ def get_database_url():
 
 engine = create_engine(
     get_database_url(),
-    pool_size=20,  # Increased from default 5
-    max_overflow=30,  # Increased from default 10
-    pool_timeout=60,  # Increased timeout
-    pool_recycle=3600  # Recycle connections every hour
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=60,
+    pool_recycle=1800,  # Recycle connections every 30 minutes
+    pool_pre_ping=True,  # Replace connections dropped by the server before handing them out
+    pool_use_lifo=True,  # Reuse the most recent connection so idle overflow ones time out and close
+    query_cache_size=1200  # Keep compiled SQL for the statements the services repeat
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Thread-local sessions that keep loaded attributes usable after commit
+SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine))
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
+@contextmanager
 def get_db():
-    db = SessionLocal()
+    # Independent session so nested callers never close each other's work
+    db = SessionLocal.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def session_scope():
+    """Session that commits when the block finishes and rolls back if it raises"""
+    db = SessionLocal.session_factory()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
@@ -0,0 +1,29 @@
+from datetime import timedelta
+from types import MappingProxyType
+from dateutil.relativedelta import relativedelta
+
+ONE_DAY = timedelta(days=1)
+ONE_WEEK = timedelta(weeks=1)
+ONE_MONTH = relativedelta(months=1)
+
+# Days to the next weekday: Friday and Saturday jump to Monday, every other day moves one on
+WEEKDAY_STEPS = tuple(timedelta(days=days) for days in (1, 1, 1, 1, 3, 2, 1))
+
+# Days to the next weekend day: Saturday moves to Sunday, any other day jumps to Saturday
+WEEKEND_STEPS = tuple(timedelta(days=days) for days in (5, 4, 3, 2, 1, 1, 6))
+
+RECURRENCE_STEPS = MappingProxyType({
+    'daily': lambda current_time: current_time + ONE_DAY,
+    'weekdays': lambda current_time: current_time + WEEKDAY_STEPS[current_time.weekday()],
+    'weekends': lambda current_time: current_time + WEEKEND_STEPS[current_time.weekday()],
+    'weekly': lambda current_time: current_time + ONE_WEEK,
+    'monthly': lambda current_time: current_time + ONE_MONTH
+})
+
+def calculate_next_recurrence(current_time, recurrence_type):
+    """Calculate next occurrence based on recurrence type"""
+    try:
+        step = RECURRENCE_STEPS[recurrence_type]
+    except KeyError:
+        raise ValueError(f"Unknown recurrence type: {recurrence_type}") from None
+    return step(current_time)
@@ -93,16 +93,16 @@ class MicroservicesTests:
             time.sleep(3)
             
             # Check if station was created
-            db = next(get_db())
-            station = db.query(Station).filter(Station.name == "Test Station for Service").first()
-            
-            if station:
-                print(f"✓ Station created in database (ID: {station.id})")
-                return True
-            else:
-                print("✗ Station not found in database")
-                return False
+            with get_db() as db:
+                station = db.query(Station).filter(Station.name == "Test Station for Service").first()
                 
+                if station:
+                    print(f"✓ Station created in database (ID: {station.id})")
+                    return True
+                else:
+                    print("✗ Station not found in database")
+                    return False
+                    
         except Exception as e:
             print(f"✗ Station service test failed: {e}")
             return False
@@ -113,47 +113,47 @@ class MicroservicesTests:
             print("\n⏰ Testing Scheduler Service Functionality:")
             
             # Create a test station first
-            db = next(get_db())
-            station = db.query(Station).first()
-            
-            if not station:
-                station = Station(
-                    name="Scheduler Test Station",
-                    stream_url="http://test.com/stream.mp3",
-                    is_valid=True
+            with get_db() as db:
+                station = db.query(Station).first()
+                
+                if not station:
+                    station = Station(
+                        name="Scheduler Test Station",
+                        stream_url="http://test.com/stream.mp3",
+                        is_valid=True
+                    )
+                    db.add(station)
+                    db.commit()
+                
+                # Create a recording to schedule
+                from datetime import datetime, timedelta
+                start_time = datetime.now() + timedelta(minutes=2)
+                end_time = start_time + timedelta(minutes=5)
+                
+                recording = Recording(
+                    name="Scheduler Test Recording",
+                    station_id=station.id,
+                    start_time=start_time,
+                    end_time=end_time,
+                    status="SCHEDULED"
                 )
-                db.add(station)
+                db.add(recording)
                 db.commit()
-            
-            # Create a recording to schedule
-            from datetime import datetime, timedelta
-            start_time = datetime.now() + timedelta(minutes=2)
-            end_time = start_time + timedelta(minutes=5)
-            
-            recording = Recording(
-                name="Scheduler Test Recording",
-                station_id=station.id,
-                start_time=start_time,
-                end_time=end_time,
-                status="SCHEDULED"
-            )
-            db.add(recording)
-            db.commit()
-            
-            # Publish scheduling event
-            schedule_data = {
-                "recording_id": recording.id,
-                "start_time": start_time.isoformat(),
-                "end_time": end_time.isoformat()
-            }
-            
-            event_bus.publish('recording.schedule', schedule_data)
-            print("✓ Published recording.schedule event")
-            
-            time.sleep(2)
-            print("✓ Scheduler processed event (check logs for details)")
-            return True
-            
+                
+                # Publish scheduling event
+                schedule_data = {
+                    "recording_id": recording.id,
+                    "start_time": start_time.isoformat(),
+                    "end_time": end_time.isoformat()
+                }
+                
+                event_bus.publish('recording.schedule', schedule_data)
+                print("✓ Published recording.schedule event")
+                
+                time.sleep(2)
+                print("✓ Scheduler processed event (check logs for details)")
+                return True
+                
         except Exception as e:
             print(f"✗ Scheduler service test failed: {e}")
             return False
@@ -104,50 +104,49 @@ class RecordingTests:
     def test_recording_database_operations(self):
         """Test recording database operations"""
         try:
-            db = next(get_db())
-            
-            # Create test station
-            station = Station(
-                name="Recording Test Station",
-                stream_url="http://test.example.com/stream.mp3",
-                is_valid=True,
-                format="mp3",
-                bitrate=128
-            )
-            db.add(station)
-            db.commit()
-            
-            # Create test recording
-            start_time = datetime.now() + timedelta(minutes=1)
-            end_time = start_time + timedelta(minutes=2)
-            
-            recording = Recording(
-                name="Database Test Recording",
-                station_id=station.id,
-                start_time=start_time,
-                end_time=end_time,
-                duration=120,
-                status="SCHEDULED",
-                format="mp3",
-                bitrate=128
-            )
-            db.add(recording)
-            db.commit()
-            
-            print(f"✓ Recording created in database (ID: {recording.id})")
-            
-            # Test status updates
-            recording.status = "RECORDING"
-            db.commit()
-            
-            recording.status = "COMPLETE"
-            recording.file_path = str(self.recordings_dir / "test_recording.mp3")
-            recording.file_size = 1024000
-            db.commit()
-            
-            print("✓ Recording status updates work")
-            return True
-            
+            with get_db() as db:
+                # Create test station
+                station = Station(
+                    name="Recording Test Station",
+                    stream_url="http://test.example.com/stream.mp3",
+                    is_valid=True,
+                    format="mp3",
+                    bitrate=128
+                )
+                db.add(station)
+                db.commit()
+                
+                # Create test recording
+                start_time = datetime.now() + timedelta(minutes=1)
+                end_time = start_time + timedelta(minutes=2)
+                
+                recording = Recording(
+                    name="Database Test Recording",
+                    station_id=station.id,
+                    start_time=start_time,
+                    end_time=end_time,
+                    duration=120,
+                    status="SCHEDULED",
+                    format="mp3",
+                    bitrate=128
+                )
+                db.add(recording)
+                db.commit()
+                
+                print(f"✓ Recording created in database (ID: {recording.id})")
+                
+                # Test status updates
+                recording.status = "RECORDING"
+                db.commit()
+                
+                recording.status = "COMPLETE"
+                recording.file_path = str(self.recordings_dir / "test_recording.mp3")
+                recording.file_size = 1024000
+                db.commit()
+                
+                print("✓ Recording status updates work")
+                return True
+                
         except Exception as e:
             print(f"✗ Database operations failed: {e}")
             return False
@@ -184,52 +183,51 @@ class RecordingTests:
     def test_concurrent_recording_support(self):
         """Test database support for concurrent recordings"""
         try:
-            db = next(get_db())
-            
-            # Get or create test station
-            station = db.query(Station).filter(Station.name == "Recording Test Station").first()
-            if not station:
-                station = Station(
-                    name="Concurrent Test Station",
-                    stream_url="http://test.com/stream.mp3",
-                    is_valid=True
-                )
-                db.add(station)
+            with get_db() as db:
+                # Get or create test station
+                station = db.query(Station).filter(Station.name == "Recording Test Station").first()
+                if not station:
+                    station = Station(
+                        name="Concurrent Test Station",
+                        stream_url="http://test.com/stream.mp3",
+                        is_valid=True
+                    )
+                    db.add(station)
+                    db.commit()
+                
+                # Create multiple concurrent recordings
+                base_time = datetime.now() + timedelta(minutes=5)
+                
+                recordings = []
+                for i in range(3):
+                    recording = Recording(
+                        name=f"Concurrent Recording {i+1}",
+                        station_id=station.id,
+                        start_time=base_time,
+                        end_time=base_time + timedelta(minutes=10),
+                        status="SCHEDULED"
+                    )
+                    recordings.append(recording)
+                    db.add(recording)
+                
                 db.commit()
-            
-            # Create multiple concurrent recordings
-            base_time = datetime.now() + timedelta(minutes=5)
-            
-            recordings = []
-            for i in range(3):
-                recording = Recording(
-                    name=f"Concurrent Recording {i+1}",
+                
+                print(f"✓ Created {len(recordings)} concurrent recordings")
+                
+                # Test unique name handling
+                duplicate_recording = Recording(
+                    name="Concurrent Recording 1",  # Same name
                     station_id=station.id,
                     start_time=base_time,
-                    end_time=base_time + timedelta(minutes=10),
+                    end_time=base_time + timedelta(minutes=5),
                     status="SCHEDULED"
                 )
-                recordings.append(recording)
-                db.add(recording)
-            
-            db.commit()
-            
-            print(f"✓ Created {len(recordings)} concurrent recordings")
-            
-            # Test unique name handling
-            duplicate_recording = Recording(
-                name="Concurrent Recording 1",  # Same name
-                station_id=station.id,
-                start_time=base_time,
-                end_time=base_time + timedelta(minutes=5),
-                status="SCHEDULED"
-            )
-            db.add(duplicate_recording)
-            db.commit()
-            
-            print("✓ Duplicate name handling works")
-            return True
-            
+                db.add(duplicate_recording)
+                db.commit()
+                
+                print("✓ Duplicate name handling works")
+                return True
+                
         except Exception as e:
             print(f"✗ Concurrent recording test failed: {e}")
             return False
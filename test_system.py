@@ -58,22 +58,21 @@ class WebRadio9Tests:
     def test_database_models(self):
         """Test database connectivity and models"""
         try:
-            db = next(get_db())
-            
-            # Test Station model
-            station_count = db.query(Station).count()
-            self.log_test("Database - Station Model", True, f"Found {station_count} stations")
-            
-            # Test Recording model
-            recording_count = db.query(Recording).count()
-            self.log_test("Database - Recording Model", True, f"Found {recording_count} recordings")
-            
-            # Test Podcast model
-            podcast_count = db.query(Podcast).count()
-            self.log_test("Database - Podcast Model", True, f"Found {podcast_count} podcasts")
-            
-            return True
-            
+            with get_db() as db:
+                # Test Station model
+                station_count = db.query(Station).count()
+                self.log_test("Database - Station Model", True, f"Found {station_count} stations")
+                
+                # Test Recording model
+                recording_count = db.query(Recording).count()
+                self.log_test("Database - Recording Model", True, f"Found {recording_count} recordings")
+                
+                # Test Podcast model
+                podcast_count = db.query(Podcast).count()
+                self.log_test("Database - Podcast Model", True, f"Found {podcast_count} podcasts")
+                
+                return True
+                
         except Exception as e:
             self.log_test("Database Models", False, str(e))
             return False
@@ -98,14 +97,14 @@ class WebRadio9Tests:
                 
                 # Check if station appears in database
                 time.sleep(1)
-                db = next(get_db())
-                station = db.query(Station).filter(Station.name == "Test Radio Station").first()
-                
-                if station:
-                    self.log_test("Station Database Storage", True, f"Station ID: {station.id}")
-                    return station.id
-                else:
-                    self.log_test("Station Database Storage", False, "Station not found in DB")
+                with get_db() as db:
+                    station = db.query(Station).filter(Station.name == "Test Radio Station").first()
+                    
+                    if station:
+                        self.log_test("Station Database Storage", True, f"Station ID: {station.id}")
+                        return station.id
+                    else:
+                        self.log_test("Station Database Storage", False, "Station not found in DB")
             else:
                 self.log_test("Station Creation API", False, f"Status: {response.status_code}")
             
@@ -119,55 +118,55 @@ class WebRadio9Tests:
         """Test recording scheduling functionality"""
         try:
             # First ensure we have a station
-            db = next(get_db())
-            station = db.query(Station).first()
-            
-            if not station:
-                # Create a test station directly
-                station = Station(
-                    name="Test Station for Recording",
-                    stream_url="http://test.stream.com/audio.mp3",
-                    is_valid=True,
-                    format="mp3",
-                    bitrate=128
+            with get_db() as db:
+                station = db.query(Station).first()
+                
+                if not station:
+                    # Create a test station directly
+                    station = Station(
+                        name="Test Station for Recording",
+                        stream_url="http://test.stream.com/audio.mp3",
+                        is_valid=True,
+                        format="mp3",
+                        bitrate=128
+                    )
+                    db.add(station)
+                    db.commit()
+                
+                # Schedule a recording
+                start_time = (datetime.now() + timedelta(minutes=1)).isoformat()
+                recording_data = {
+                    "name": "Test Recording",
+                    "station_id": station.id,
+                    "start_time": start_time,
+                    "duration": 5,  # 5 minutes
+                    "format": "mp3",
+                    "save_to_additional_local": False,
+                    "save_to_nextcloud": False
+                }
+                
+                response = self.session.post(
+                    f"{self.base_url}/api/recordings",
+                    json=recording_data,
+                    headers={"Content-Type": "application/json"}
                 )
-                db.add(station)
-                db.commit()
-            
-            # Schedule a recording
-            start_time = (datetime.now() + timedelta(minutes=1)).isoformat()
-            recording_data = {
-                "name": "Test Recording",
-                "station_id": station.id,
-                "start_time": start_time,
-                "duration": 5,  # 5 minutes
-                "format": "mp3",
-                "save_to_additional_local": False,
-                "save_to_nextcloud": False
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/api/recordings",
-                json=recording_data,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                self.log_test("Recording Scheduling API", True, f"Recording ID: {result.get('recording_id')}")
                 
-                # Verify in database
-                recording = db.query(Recording).filter(Recording.name == "Test Recording").first()
-                if recording and recording.status == "SCHEDULED":
-                    self.log_test("Recording Database Entry", True, f"Status: {recording.status}")
-                    return recording.id
+                if response.status_code == 200:
+                    result = response.json()
+                    self.log_test("Recording Scheduling API", True, f"Recording ID: {result.get('recording_id')}")
+                    
+                    # Verify in database
+                    recording = db.query(Recording).filter(Recording.name == "Test Recording").first()
+                    if recording and recording.status == "SCHEDULED":
+                        self.log_test("Recording Database Entry", True, f"Status: {recording.status}")
+                        return recording.id
+                    else:
+                        self.log_test("Recording Database Entry", False, "Recording not properly scheduled")
                 else:
-                    self.log_test("Recording Database Entry", False, "Recording not properly scheduled")
-            else:
-                self.log_test("Recording Scheduling API", False, f"Status: {response.status_code}")
-            
-            return None
-            
+                    self.log_test("Recording Scheduling API", False, f"Status: {response.status_code}")
+                
+                return None
+                
         except Exception as e:
             self.log_test("Recording Scheduling", False, str(e))
             return None
@@ -194,22 +193,22 @@ class WebRadio9Tests:
                 self.log_test("Podcast Creation API", True, "Podcast created successfully")
                 
                 # Verify in database
-                db = next(get_db())
-                podcast = db.query(Podcast).filter(Podcast.title == "Test Podcast").first()
-                
-                if podcast:
-                    self.log_test("Podcast Database Storage", True, f"UUID: {podcast.uuid}")
+                with get_db() as db:
+                    podcast = db.query(Podcast).filter(Podcast.title == "Test Podcast").first()
                     
-                    # Test RSS feed generation
-                    rss_response = self.session.get(f"{self.base_url}/podcasts/{podcast.uuid}/rss")
-                    if rss_response.status_code == 200 and "<?xml" in rss_response.text:
-                        self.log_test("RSS Feed Generation", True, "Valid RSS XML generated")
+                    if podcast:
+                        self.log_test("Podcast Database Storage", True, f"UUID: {podcast.uuid}")
+                        
+                        # Test RSS feed generation
+                        rss_response = self.session.get(f"{self.base_url}/podcasts/{podcast.uuid}/rss")
+                        if rss_response.status_code == 200 and "<?xml" in rss_response.text:
+                            self.log_test("RSS Feed Generation", True, "Valid RSS XML generated")
+                        else:
+                            self.log_test("RSS Feed Generation", False, f"RSS Status: {rss_response.status_code}")
+                        
+                        return podcast.id
                     else:
-                        self.log_test("RSS Feed Generation", False, f"RSS Status: {rss_response.status_code}")
-                    
-                    return podcast.id
-                else:
-                    self.log_test("Podcast Database Storage", False, "Podcast not found in DB")
+                        self.log_test("Podcast Database Storage", False, "Podcast not found in DB")
             else:
                 self.log_test("Podcast Creation API", False, f"Status: {response.status_code}")
             
@@ -20,14 +20,14 @@ def index():
 @app.route('/api/stations')
 def api_stations():
     try:
-        db = next(get_db())
-        stations = db.query(Station).all()
-        return jsonify([{
-            'id': s.id,
-            'name': s.name,
-            'stream_url': s.stream_url,
-            'is_valid': s.is_valid
-        } for s in stations])
+        with get_db() as db:
+            stations = db.query(Station).all()
+            return jsonify([{
+                'id': s.id,
+                'name': s.name,
+                'stream_url': s.stream_url,
+                'is_valid': s.is_valid
+            } for s in stations])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 